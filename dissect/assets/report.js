@@ -0,0 +1,1996 @@
+// Global variables
+let API_KEY = '';
+let MIN_IMAGE_SIZE = 256;
+let PAGES_PER_CHUNK = 25;
+let AI_CONCURRENCY = 4;
+let AUTO_LOAD_ENABLED = true;
+let currentLoadedPages = 0;
+let totalPages = 0;
+let isLoading = false;
+// Loaded page data indexed by page number (index 0 unused)
+let pagesData = [];
+let pagesIndex = null;
+let pagesChunkRequests = new Map();
+let analysisCache = new Map();
+let analysisInProgress = new Set();
+// Running analyses by image hash, so duplicates of an image wait for one request
+let pendingAnalysesByHash = new Map();
+let hashAnalysisCache = new Map();
+let analysisNodeCache = new Map();
+let intersectionObserver = null;
+let pageVisibilityObserver = null;
+let cardObserver = null;
+let detachedPages = new Map();
+// Off-screen pages left mounted only because an analysis on them was still running
+let pagesAwaitingDetach = new Set();
+let markedLoader = null;
+let geminiQueue = { active: 0, pending: [] };
+// Abort controllers for Gemini requests by image id, and pending abort timers by page section
+let analysisControllers = new Map();
+// Gemini request URL with the API key it was built for
+let geminiRequestUrl = { apiKey: null, href: '' };
+let analysisAbortTimers = new Map();
+let pageTemplates = new Map();
+let minImageCaption = null;
+let pageImagePartitions = new WeakMap();
+let encodeWorker = null;
+let encodeRequests = new Map();
+let encodeRequestId = 0;
+let fallbackCanvas = null;
+let markdownWorker = null;
+let markdownRequests = new Map();
+let markdownRequestId = 0;
+let analysisDB = null;
+
+const GEMINI_MODEL = 'gemini-2.5-flash-lite-preview-06-17';
+// Server-sent events endpoint, so partial answers can be shown while the model is still writing
+const GEMINI_API_URL = `https://generativelanguage.googleapis.com/v1beta/models/${GEMINI_MODEL}:streamGenerateContent?alt=sse`;
+const GEMINI_PROMPT = "Please provide a comprehensive analysis of this image using markdown formatting. Structure your response with clear headers and formatting. Include: **1. Overall Scene Description** - What is the main subject or scene? **2. Visual Elements** - Describe colors, lighting, composition, and style. **3. Text Content** - If there's any text, transcribe it and explain its context. **4. Technical Details** - Charts, graphs, diagrams, or technical content. **5. Objects and People** - Identify and describe any objects, people, or animals. **6. Spatial Relationships** - How elements are positioned relative to each other. **7. Context and Purpose** - What might this image be used for or represent? **8. Quality Assessment** - Image quality, resolution, any artifacts or issues. Use markdown formatting with headers, bold text, lists, and proper structure to make the analysis clear and readable.";
+const GEMINI_GENERATION_CONFIG = Object.freeze({ temperature: 0.3, maxOutputTokens: 1000 });
+// Request JSON around the base64 image, serialized once; base64 needs no JSON escaping
+const GEMINI_BODY_PREFIX = '{"contents":[{"parts":[{"text":' + JSON.stringify(GEMINI_PROMPT) +
+    '},{"inline_data":{"mime_type":"image/jpeg","data":"';
+const GEMINI_BODY_SUFFIX = '"}}]}],"generationConfig":' + JSON.stringify(GEMINI_GENERATION_CONFIG) + '}';
+// Retries for rate-limited (429) or failed (5xx) Gemini requests, and the backoff cap
+const GEMINI_MAX_RETRIES = 5;
+const GEMINI_MAX_RETRY_DELAY_MS = 30000;
+// Analyses still running this long after their page scrolled out of range are cancelled
+const ANALYSIS_ABORT_DELAY_MS = 30000;
+const MARKED_URL = 'https://cdn.jsdelivr.net/npm/marked@12.0.2/marked.min.js';
+// Page sections farther than this from the viewport have their content detached
+const PAGE_DETACH_MARGIN = '2000px 0px';
+// The next chunk starts loading once the load-more button is this close to the viewport
+const AUTO_LOAD_MARGIN = '500px';
+// Image card placeholders closer than this to the viewport are replaced with real cards
+const CARD_MATERIALIZE_MARGIN = '200px';
+// Upper bound on rendered analyses kept in memory per cache
+const ANALYSIS_CACHE_SIZE = 256;
+// IndexedDB store for analyses keyed by image hash, so reopened reports skip the API
+const ANALYSIS_DB_NAME = 'dissect-ai';
+const ANALYSIS_DB_STORE = 'analyses';
+// Stored analyses beyond this count are evicted oldest first
+const ANALYSIS_DB_LIMIT = 2000;
+// Stored keys carry the model and a prompt digest, so changing either skips stale answers
+const ANALYSIS_KEY_PREFIX = GEMINI_MODEL + ':' + djb2(GEMINI_PROMPT) + ':';
+// Page screenshots have no content hash, only this prefix plus the page number, which every
+// report shares; their analyses are cached in memory but never stored
+const SCREENSHOT_HASH_PREFIX = 'screenshot_';
+
+// Progress logging is off unless the report is opened with ?debug
+const DEBUG = new URLSearchParams(location.search).has('debug');
+
+function debugLog(...args) {
+    if (DEBUG) console.log(...args);
+}
+
+// Settings management
+const STORAGE_KEY = 'pdfExtractorSettings';
+
+// Fixed-id elements (settings controls, pagination, modals), looked up once at startup
+// and shared by every handler
+const CACHED_ELEMENT_IDS = [
+    'apiKeyInput', 'minImageSizeSlider', 'pagesPerChunkSlider', 'autoLoadPages',
+    'showSmallImages', 'minImageSizeValue', 'pagesPerChunkValue', 'settingsPanel',
+    'aiConcurrencySlider', 'aiConcurrencyValue',
+    'pagesContainer', 'lazyPages', 'loadMoreContainer', 'loadMoreBtn', 'endIndicator',
+    'loadingIndicator', 'imageModal', 'modalImage', 'modalImageInfo', 'aiModal', 'aiModalBody'
+];
+const els = {};
+
+const SAVE_DELAY_MS = 200;
+let saveTimer = null;
+
+let sliderFrame = 0;
+const pendingSliderUpdates = new Set();
+
+function cacheElements() {
+    CACHED_ELEMENT_IDS.forEach(id => {
+        els[id] = document.getElementById(id);
+    });
+}
+
+function loadSettings() {
+    try {
+        const savedSettings = localStorage.getItem(STORAGE_KEY);
+        if (savedSettings) {
+            const settings = JSON.parse(savedSettings);
+            API_KEY = settings.apiKey || '';
+            MIN_IMAGE_SIZE = settings.minImageSize || 256;
+            PAGES_PER_CHUNK = settings.pagesPerChunk || 25;
+            AI_CONCURRENCY = settings.aiConcurrency || 4;
+            AUTO_LOAD_ENABLED = settings.autoLoadEnabled !== false;
+            
+            // Update UI elements
+            const apiInput = els.apiKeyInput;
+            const sizeSlider = els.minImageSizeSlider;
+            const chunkSlider = els.pagesPerChunkSlider;
+            const concurrencySlider = els.aiConcurrencySlider;
+            const autoLoadCheck = els.autoLoadPages;
+            const showSmallCheck = els.showSmallImages;
+            
+            if (apiInput) apiInput.value = API_KEY;
+            if (sizeSlider) sizeSlider.value = MIN_IMAGE_SIZE;
+            if (chunkSlider) chunkSlider.value = PAGES_PER_CHUNK;
+            if (concurrencySlider) concurrencySlider.value = AI_CONCURRENCY;
+            if (autoLoadCheck) autoLoadCheck.checked = AUTO_LOAD_ENABLED;
+            if (showSmallCheck && settings.showSmallImages) {
+                showSmallCheck.checked = settings.showSmallImages;
+            }
+            
+            updateMinImageSize();
+            updatePagesPerChunk();
+            updateAIConcurrency();
+            
+            // Apply settings immediately
+            applySettingsToUI();
+        }
+    } catch (error) {
+        console.error('Error loading settings:', error);
+    }
+}
+
+function applySettingsToUI() {
+    debugLog('Applying settings to UI...');
+    debugLog('API_KEY:', API_KEY ? `Set (${API_KEY.length} chars)` : 'Not set');
+    debugLog('MIN_IMAGE_SIZE:', MIN_IMAGE_SIZE);
+    
+    // Apply API key settings - show/hide AI buttons and sections
+    if (API_KEY && API_KEY.trim() !== '') {
+        debugLog('API key found, enabling AI features');
+        enableAIFeatures();
+    } else {
+        debugLog('No API key, disabling AI features');
+        disableAIFeatures();
+    }
+    
+    // Apply small images setting
+    applyImageSizeFilter();
+    
+    // Apply auto-load setting
+    if (AUTO_LOAD_ENABLED) {
+        setupIntersectionObserver();
+    }
+    
+    // Update image size filter display
+    updateImageSizeDisplay();
+}
+
+function applyImageSizeFilter() {
+    const showSmallCheck = els.showSmallImages;
+    document.body.classList.toggle('show-small-images', showSmallCheck ? showSmallCheck.checked : false);
+    applyMinImageSize(document);
+}
+
+// Mark cards below the current size threshold; CSS hides them while small images are off
+function applyMinImageSize(root) {
+    const minArea = MIN_IMAGE_SIZE * MIN_IMAGE_SIZE;
+
+    // Unrendered card placeholders carry the image dimensions themselves
+    root.querySelectorAll('.relative.group, .img-card-stub').forEach(card => {
+        const img = card.querySelector('img') || card;
+        if (img.dataset.width !== undefined) {
+            const area = (parseInt(img.dataset.width) || 0) * (parseInt(img.dataset.height) || 0);
+            card.classList.toggle('below-min-size', area < minArea);
+        }
+    });
+
+    root.querySelectorAll('.small-images').forEach(container => {
+        const hasRegular = container.querySelector('.relative.group:not(.below-min-size), .img-card-stub:not(.below-min-size)') !== null;
+        container.classList.toggle('has-regular-size', hasRegular);
+    });
+}
+
+// AI buttons and sections are always rendered; a class on <body> shows or hides them all
+function enableAIFeatures() {
+    document.body.classList.add('ai-enabled');
+}
+
+function disableAIFeatures() {
+    document.body.classList.remove('ai-enabled');
+}
+
+function updateImageSizeDisplay() {
+    // Update the filter description in the header
+    if (!minImageCaption) {
+        minImageCaption = document.querySelector('[data-role="min-image-caption"]');
+    }
+    if (minImageCaption) {
+        minImageCaption.textContent = `Small images have an area less than ${MIN_IMAGE_SIZE}×${MIN_IMAGE_SIZE} pixels`;
+    }
+    
+    // Note: Full re-filtering would require regenerating content
+    // For now, we'll just update the display text
+    debugLog(`Image size filter display updated to ${MIN_IMAGE_SIZE}px`);
+}
+
+function gatherSettings() {
+    return {
+        apiKey: API_KEY,
+        minImageSize: MIN_IMAGE_SIZE,
+        pagesPerChunk: PAGES_PER_CHUNK,
+        aiConcurrency: AI_CONCURRENCY,
+        autoLoadEnabled: AUTO_LOAD_ENABLED,
+        showSmallImages: els.showSmallImages ? els.showSmallImages.checked : false,
+        timestamp: new Date().toISOString()
+    };
+}
+
+// Control handlers only schedule a write; bursts of changes collapse into one trailing save
+function scheduleSave() {
+    clearTimeout(saveTimer);
+    saveTimer = setTimeout(flushSettings, SAVE_DELAY_MS);
+}
+
+function flushSettings() {
+    clearTimeout(saveTimer);
+    saveTimer = null;
+    try {
+        localStorage.setItem(STORAGE_KEY, JSON.stringify(gatherSettings()));
+    } catch (error) {
+        console.error('Error saving settings:', error);
+    }
+}
+
+function saveSettings() {
+    try {
+        flushSettings();
+        
+        debugLog('Settings saved successfully');
+
+        // Apply settings to the UI
+        applySettingsToUI();
+    } catch (error) {
+        console.error('Error saving settings:', error);
+    }
+}
+
+function resetSettings() {
+    try {
+        localStorage.removeItem(STORAGE_KEY);
+        
+        // Reset to defaults
+        API_KEY = '';
+        MIN_IMAGE_SIZE = 256;
+        PAGES_PER_CHUNK = 25;
+        AI_CONCURRENCY = 4;
+        AUTO_LOAD_ENABLED = true;
+        
+        // Update UI
+        const apiInput = els.apiKeyInput;
+        const sizeSlider = els.minImageSizeSlider;
+        const chunkSlider = els.pagesPerChunkSlider;
+        const concurrencySlider = els.aiConcurrencySlider;
+        const autoLoadCheck = els.autoLoadPages;
+        
+        if (apiInput) apiInput.value = '';
+        if (sizeSlider) sizeSlider.value = 256;
+        if (chunkSlider) chunkSlider.value = 25;
+        if (concurrencySlider) concurrencySlider.value = 4;
+        if (autoLoadCheck) autoLoadCheck.checked = true;
+        
+        updateMinImageSize();
+        updatePagesPerChunk();
+        updateAIConcurrency();
+        clearTimeout(saveTimer);
+        saveTimer = null;
+        
+        debugLog('Settings reset to defaults');
+        location.reload(); // Reload to apply changes
+    } catch (error) {
+        console.error('Error resetting settings:', error);
+    }
+}
+
+// Settings panel functions
+function toggleSettings() {
+    const panel = els.settingsPanel;
+    if (panel) {
+        panel.classList.toggle('show');
+    }
+}
+
+function updateAPIKey() {
+    const input = els.apiKeyInput;
+    if (input) {
+        API_KEY = input.value.trim();
+        debugLog('API Key updated:', API_KEY ? 'Set' : 'Empty');
+        scheduleSave();
+    }
+}
+
+// Sliders report every input tick; run each slider's updater at most once per frame
+function scheduleSliderUpdate(update) {
+    pendingSliderUpdates.add(update);
+    if (sliderFrame) return;
+    sliderFrame = requestAnimationFrame(() => {
+        sliderFrame = 0;
+        const updates = Array.from(pendingSliderUpdates);
+        pendingSliderUpdates.clear();
+        updates.forEach(pendingUpdate => pendingUpdate());
+    });
+}
+
+function updateMinImageSize() {
+    const slider = els.minImageSizeSlider;
+    const valueDisplay = els.minImageSizeValue;
+    if (slider && valueDisplay) {
+        MIN_IMAGE_SIZE = parseInt(slider.value);
+        valueDisplay.textContent = MIN_IMAGE_SIZE + 'px';
+        applyImageSizeFilter();
+        scheduleSave();
+    }
+}
+
+function updatePagesPerChunk() {
+    const slider = els.pagesPerChunkSlider;
+    const valueDisplay = els.pagesPerChunkValue;
+    if (slider && valueDisplay) {
+        PAGES_PER_CHUNK = parseInt(slider.value);
+        valueDisplay.textContent = PAGES_PER_CHUNK;
+        scheduleSave();
+    }
+}
+
+function updateAIConcurrency() {
+    const slider = els.aiConcurrencySlider;
+    const valueDisplay = els.aiConcurrencyValue;
+    if (slider && valueDisplay) {
+        AI_CONCURRENCY = parseInt(slider.value);
+        valueDisplay.textContent = AI_CONCURRENCY;
+        scheduleSave();
+        // A higher limit can start queued requests right away
+        pumpGeminiQueue();
+    }
+}
+
+function toggleAutoLoad() {
+    const checkbox = els.autoLoadPages;
+    if (checkbox) {
+        AUTO_LOAD_ENABLED = checkbox.checked;
+        if (AUTO_LOAD_ENABLED) {
+            setupIntersectionObserver();
+        } else {
+            if (intersectionObserver) {
+                intersectionObserver.disconnect();
+            }
+        }
+        scheduleSave();
+    }
+}
+
+function toggleSmallImages() {
+    const showSmallCheck = els.showSmallImages;
+    document.body.classList.toggle('show-small-images', showSmallCheck ? showSmallCheck.checked : false);
+    scheduleSave();
+}
+
+
+// Lazy loading functions
+async function loadPagesData() {
+    // Only the small index is fetched up front; page data shards are loaded on demand
+    try {
+        const response = await fetch(window.location.pathname.replace('_report.html', '_pages.json'));
+        if (response.ok) {
+            pagesIndex = await response.json();
+            totalPages = pagesIndex.total_pages;
+            debugLog(`Loaded index for ${totalPages} pages`);
+            return true;
+        }
+    } catch (error) {
+        console.error('Error loading pages data:', error);
+    }
+    return false;
+}
+
+// Format the per-page strings once as a shard arrives and drop the full text, which
+// is only ever shown as a preview
+function preparePageData(pageData) {
+    const text = pageData.text || '';
+    pageData.textPreview = text.length > TEXT_PREVIEW_LENGTH ? text.slice(0, TEXT_PREVIEW_LENGTH) + '...' : text;
+    pageData.wordCountLabel = `${pageData.word_count.toLocaleString()} words`;
+    pageData.tokenCountLabel = `${pageData.token_count.toLocaleString()} tokens`;
+    pageData.text = null;
+}
+
+function storePageLine(line) {
+    if (!line.trim()) return;
+    const pageData = JSON.parse(line);
+    preparePageData(pageData);
+    pagesData[pageData.page_number] = pageData;
+}
+
+// Shards are newline-delimited JSON; parse each page as soon as its line has arrived
+// rather than parsing the whole shard in one go after the download
+async function readPageLines(response) {
+    if (!response.body || typeof TextDecoderStream === 'undefined') {
+        (await response.text()).split('\n').forEach(storePageLine);
+        return;
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffered = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += value;
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.forEach(storePageLine);
+    }
+    storePageLine(buffered);
+}
+
+function loadPagesChunk(chunkIndex) {
+    // Fetch each shard at most once; concurrent callers share the same request
+    if (!pagesChunkRequests.has(chunkIndex)) {
+        const chunkFile = pagesIndex.chunks[chunkIndex];
+        const request = fetch(chunkFile)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to load ${chunkFile}`);
+                }
+                return readPageLines(response);
+            })
+            .catch(error => {
+                pagesChunkRequests.delete(chunkIndex);
+                throw error;
+            });
+        pagesChunkRequests.set(chunkIndex, request);
+    }
+    return pagesChunkRequests.get(chunkIndex);
+}
+
+async function ensurePagesLoaded(startPage, endPage) {
+    if (!pagesIndex) return;
+
+    const chunkSize = pagesIndex.chunk_size;
+    const requests = [];
+    for (let chunkIndex = Math.floor((startPage - 1) / chunkSize); chunkIndex <= Math.floor((endPage - 1) / chunkSize); chunkIndex++) {
+        if (pagesIndex.chunks[chunkIndex]) {
+            requests.push(loadPagesChunk(chunkIndex));
+        }
+    }
+    await Promise.all(requests);
+}
+
+// Lazily rendered pages are cloned from the <template> elements emitted with the report,
+// so the static markup is parsed once and only the per-page text and attributes are filled in
+function cloneTemplate(id) {
+    let template = pageTemplates.get(id);
+    if (!template) {
+        template = document.getElementById(id);
+        pageTemplates.set(id, template);
+    }
+    return template.content.firstElementChild.cloneNode(true);
+}
+
+function fillSlot(root, name, text) {
+    const slot = root.querySelector(`[data-slot="${name}"]`);
+    if (slot) slot.textContent = text;
+    return slot;
+}
+
+function removeSlot(root, name) {
+    const slot = root.querySelector(`[data-slot="${name}"]`);
+    if (slot) slot.remove();
+}
+
+// Split a page's images around the current size threshold in one pass; the split is
+// remembered per page until the threshold changes
+function partitionPageImages(pageData) {
+    const cached = pageImagePartitions.get(pageData);
+    if (cached && cached.cutoff === MIN_IMAGE_SIZE) return cached;
+
+    const minArea = MIN_IMAGE_SIZE * MIN_IMAGE_SIZE;
+    const partition = { cutoff: MIN_IMAGE_SIZE, regular: [], small: [] };
+    (pageData.images || []).forEach(img => {
+        if ((img.width || 0) * (img.height || 0) >= minArea) {
+            partition.regular.push(img);
+        } else {
+            partition.small.push(img);
+        }
+    });
+    pageImagePartitions.set(pageData, partition);
+    return partition;
+}
+
+function renderPageFromData(pageNumber) {
+    const pageData = pagesData[pageNumber];
+    if (!pageData) return null;
+    
+    const { regular: regular_page_images, small: small_page_images } = partitionPageImages(pageData);
+    const screenshot_filename = pageData.screenshot;
+    
+    const page = cloneTemplate('pageTemplate');
+    page.dataset.page = pageNumber;
+    fillSlot(page, 'number', pageNumber);
+    fillSlot(page, 'title', `Page ${pageNumber}`);
+    fillSlot(page, 'words', pageData.wordCountLabel);
+    fillSlot(page, 'tokens', pageData.tokenCountLabel);
+    fillSlot(page, 'images-count', `${regular_page_images.length} images`);
+    if (small_page_images.length > 0) {
+        fillSlot(page, 'small-count', `${small_page_images.length} small`);
+    } else {
+        removeSlot(page, 'small-count');
+    }
+    fillSlot(page, 'text', pageData.textPreview);
+    page.querySelector('[data-slot="screenshot"]').appendChild(generateScreenshotSection(screenshot_filename, pageNumber));
+    page.querySelector('[data-slot="images"]').appendChild(generateImagesSection(regular_page_images, small_page_images));
+    return page;
+}
+
+function generateScreenshotSection(screenshot_filename, page_num) {
+    if (!screenshot_filename) {
+        return cloneTemplate('noScreenshotTemplate');
+    }
+
+    const screenshot_img_obj = {
+        filename: screenshot_filename,
+        page: page_num,
+        index: 'screenshot',
+        width: 1024,
+        height: 768,
+        format: 'PNG',
+        size_bytes: 0,
+        hash: SCREENSHOT_HASH_PREFIX + page_num
+    };
+
+    const section = cloneTemplate('screenshotSectionTemplate');
+    section.appendChild(generateImageCard(screenshot_img_obj, false, true));
+    return section;
+}
+
+function generateImagesSection(regular_images, small_images) {
+    const section = cloneTemplate('imagesSectionTemplate');
+    fillSlot(section, 'heading', `Images (${regular_images.length} regular${small_images.length > 0 ? `, ${small_images.length} small` : ''})`);
+    
+    if (regular_images.length === 0 && small_images.length === 0) {
+        removeSlot(section, 'regular');
+        removeSlot(section, 'small-images');
+        return section;
+    }
+    removeSlot(section, 'empty');
+    
+    if (regular_images.length > 0) {
+        const grid = section.querySelector('[data-slot="regular"]');
+        regular_images.forEach(img => {
+            grid.appendChild(createImageCardStub(img, false));
+        });
+    } else {
+        removeSlot(section, 'regular');
+    }
+    
+    if (small_images.length > 0) {
+        fillSlot(section, 'min-size', `${MIN_IMAGE_SIZE}×${MIN_IMAGE_SIZE}`);
+        const grid = section.querySelector('[data-slot="small"]');
+        small_images.forEach(img => {
+            grid.appendChild(createImageCardStub(img, true));
+        });
+    } else {
+        removeSlot(section, 'small-images');
+    }
+    
+    return section;
+}
+
+// Page images start out as empty placeholders carrying their data; the card observer
+// builds the real card only once a placeholder comes near the viewport
+function createImageCardStub(img, isSmall) {
+    const stub = document.createElement('div');
+    stub.className = 'img-card-stub';
+    stub.dataset.img = JSON.stringify(img);
+    stub.dataset.width = img.width;
+    stub.dataset.height = img.height;
+    if (isSmall) {
+        stub.dataset.small = 'true';
+        stub.classList.add('below-min-size');
+    }
+    return stub;
+}
+
+function materializeImageCard(stub) {
+    if (cardObserver) cardObserver.unobserve(stub);
+    if (!stub.isConnected) return;
+
+    const card = generateImageCard(JSON.parse(stub.dataset.img), stub.dataset.small === 'true');
+    card.classList.toggle('below-min-size', stub.classList.contains('below-min-size'));
+    stub.replaceWith(card);
+}
+
+function setupCardObserver() {
+    if (cardObserver) {
+        cardObserver.disconnect();
+    }
+
+    cardObserver = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                materializeImageCard(entry.target);
+            }
+        });
+    }, {
+        rootMargin: CARD_MATERIALIZE_MARGIN
+    });
+}
+
+function observeCardStubs(root) {
+    root.querySelectorAll('.img-card-stub').forEach(stub => {
+        if (cardObserver) {
+            cardObserver.observe(stub);
+        } else {
+            materializeImageCard(stub);
+        }
+    });
+}
+
+function generateImageCard(img, isSmall, isScreenshot = false) {
+    if (!img.filename) {
+        const failed = cloneTemplate('failedImageTemplate');
+        fillSlot(failed, 'message', `Failed to extract image ${img.index}`);
+        return failed;
+    }
+    
+    const imageClass = isSmall ? 
+        "w-full h-20 object-contain clickable-image hover:scale-105 transition-transform duration-200" :
+        isScreenshot ? "w-full h-auto object-contain clickable-image" : "w-full h-48 object-contain clickable-image hover:scale-105 transition-transform duration-200";
+    const paddingClass = isSmall ? "p-2" : "p-3";
+    
+    // AI controls are always emitted for regular images; CSS hides them without an API key
+    const showAI = !isSmall;
+
+    const altText = isScreenshot ? `Screenshot of Page ${img.page}` : `Page ${img.page} Image ${img.index}`;
+    const dataImageId = isScreenshot ? `page_${img.page}_screenshot` : `${img.page}_${img.index}`;
+
+    const card = cloneTemplate('imageCardTemplate');
+
+    const image = card.querySelector('img');
+    image.src = `images/${img.filename}`;
+    image.alt = altText;
+    image.className = imageClass;
+    image.dataset.imageId = dataImageId;
+    image.dataset.imageFilename = img.filename;
+    image.dataset.imageHash = img.hash || '';
+    image.dataset.width = img.width;
+    image.dataset.height = img.height;
+    image.dataset.page = img.page;
+    image.dataset.index = img.index;
+    image.dataset.format = img.format || 'unknown';
+    image.dataset.size = formatBytes(img.size_bytes || 0);
+
+    // Duplicate info is not part of the page data, so lazily rendered images are marked unique
+    if (isScreenshot) {
+        removeSlot(card, 'indicator');
+    }
+
+    card.querySelector('[data-slot="details"]').className = paddingClass;
+    fillSlot(card, 'label', isScreenshot ? 'Screenshot' : `Image ${img.index}`);
+    fillSlot(card, 'format', (img.format || 'unknown').toUpperCase());
+    if (isSmall) {
+        removeSlot(card, 'dimensions');
+    } else {
+        card.querySelector('[data-slot="dimensions"] span').textContent = `${img.width} × ${img.height}`;
+    }
+
+    if (showAI) {
+        fillAIAnalysisSection(card, img);
+    } else {
+        removeSlot(card, 'ai-button');
+        removeSlot(card, 'ai-section');
+    }
+    return card;
+}
+
+function fillAIAnalysisSection(card, img) {
+    const imageId = img.index === 'screenshot' ? `page_${img.page}_screenshot` : `${img.page}_${img.index}`;
+    
+    const button = card.querySelector('[data-slot="analyze"]');
+    button.id = `btn-${imageId}`;
+    card.querySelector('[data-slot="analysis"]').id = `analysis-${imageId}`;
+}
+
+// Number of characters of page text shown in the report
+const TEXT_PREVIEW_LENGTH = 2000;
+
+const BYTE_UNITS = ['B', 'KB', 'MB', 'GB'];
+const BYTE_DIVISORS = [1, 1024, 1048576, 1073741824];
+
+function formatBytes(bytes) {
+    if (!bytes) return '0 B';
+    // Unit index is floor(log2(bytes) / 10), read off the leading-zero count
+    const i = Math.min(3, (31 - Math.clz32(bytes)) / 10 | 0);
+    return parseFloat((bytes / BYTE_DIVISORS[i]).toFixed(1)) + ' ' + BYTE_UNITS[i];
+}
+
+async function loadMorePages() {
+    if (isLoading || currentLoadedPages >= totalPages) return;
+    
+    isLoading = true;
+    const loadBtn = els.loadMoreBtn;
+    const loadContainer = els.loadMoreContainer;
+    const lazyPages = els.lazyPages;
+    const endIndicator = els.endIndicator;
+    
+    if (loadBtn) {
+        loadBtn.disabled = true;
+        loadBtn.innerHTML = '<svg class="animate-spin -ml-1 mr-3 h-5 w-5 text-white"><use href="#i-spinner"></use></svg>Loading...';
+    }
+    
+    // Load next chunk of pages
+    const startPage = currentLoadedPages + 1;
+    const endPage = Math.min(startPage + PAGES_PER_CHUNK - 1, totalPages);
+    
+    try {
+        await ensurePagesLoaded(startPage, endPage);
+    } catch (error) {
+        console.error('Error loading pages data:', error);
+    }
+    
+    // Build the whole chunk off-document and insert it with a single append
+    const fragment = document.createDocumentFragment();
+    for (let pageNum = startPage; pageNum <= endPage; pageNum++) {
+        const page = renderPageFromData(pageNum);
+        if (page) fragment.appendChild(page);
+    }
+    
+    if (lazyPages && fragment.childElementCount > 0) {
+        const newPages = Array.from(fragment.children);
+        lazyPages.appendChild(fragment);
+        newPages.forEach(observeCardStubs);
+        
+        animatePagesIn(newPages);
+        observePageSections(newPages);
+        
+        currentLoadedPages = endPage;
+    }
+    
+    // Update load more button
+    if (loadBtn) {
+        loadBtn.disabled = false;
+        if (currentLoadedPages >= totalPages) {
+            loadContainer.style.display = 'none';
+            endIndicator.style.display = 'block';
+        } else {
+            const remaining = totalPages - currentLoadedPages;
+            const nextChunkSize = Math.min(PAGES_PER_CHUNK, remaining);
+            loadBtn.innerHTML = `Load More Pages (${nextChunkSize} more)`;
+        }
+    }
+    
+    isLoading = false;
+}
+
+// Reveal a batch of pages in a single frame; the stagger comes from each page's
+// --i animation delay rather than one timer per page
+function animatePagesIn(pages) {
+    requestAnimationFrame(() => {
+        pages.forEach((page, index) => {
+            page.style.setProperty('--i', index);
+            page.classList.add('loaded');
+        });
+    });
+}
+
+function setupIntersectionObserver() {
+    if (intersectionObserver) {
+        intersectionObserver.disconnect();
+    }
+
+    if (!AUTO_LOAD_ENABLED) return;
+    
+    intersectionObserver = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting && !isLoading && currentLoadedPages < totalPages) {
+                loadMorePages();
+            }
+        });
+    }, {
+        rootMargin: AUTO_LOAD_MARGIN
+    });
+    
+    // Observe the load more container
+    const loadContainer = els.loadMoreContainer;
+    if (loadContainer) {
+        intersectionObserver.observe(loadContainer);
+    }
+}
+
+// Offscreen page virtualization: a page section keeps its element (sized to its last
+// height) but its content is swapped out for an HTML string while far from the viewport
+function setupPageVisibilityObserver() {
+    if (pageVisibilityObserver) {
+        pageVisibilityObserver.disconnect();
+    }
+
+    pageVisibilityObserver = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                attachPage(entry.target);
+            } else {
+                detachPage(entry.target);
+            }
+        });
+    }, {
+        rootMargin: PAGE_DETACH_MARGIN
+    });
+
+    observePageSections(document.querySelectorAll('.page-section'));
+}
+
+function observePageSections(sections) {
+    if (!pageVisibilityObserver) return;
+    sections.forEach(section => pageVisibilityObserver.observe(section));
+}
+
+function displaySettingsKey() {
+    return `${MIN_IMAGE_SIZE}`;
+}
+
+function detachPage(section) {
+    if (detachedPages.has(section)) return;
+
+    // Keep pages with a pending AI request mounted so the result has somewhere to land,
+    // unless the request is still running long after the page left
+    if (pendingAnalysisIds(section).length > 0) {
+        pagesAwaitingDetach.add(section);
+        scheduleAnalysisAbort(section);
+        return;
+    }
+    pagesAwaitingDetach.delete(section);
+
+    if (cardObserver) {
+        section.querySelectorAll('.img-card-stub').forEach(stub => cardObserver.unobserve(stub));
+    }
+
+    section.style.height = `${section.offsetHeight}px`;
+    detachedPages.set(section, { html: section.innerHTML, settings: displaySettingsKey() });
+    section.textContent = '';
+}
+
+function pendingAnalysisIds(section) {
+    const ids = [];
+    for (const imageId of analysisInProgress) {
+        if (section.querySelector(`[id="analysis-${imageId}"]`)) ids.push(imageId);
+    }
+    return ids;
+}
+
+// Marks an analysis as settled; once its result is shown, an off-screen page that was
+// kept mounted only for it is detached like any other
+function finishAnalysis(imageId) {
+    analysisInProgress.delete(imageId);
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    const section = analysisDiv && analysisDiv.closest('.page-section');
+    if (!section || !pagesAwaitingDetach.has(section) || pendingAnalysisIds(section).length > 0) return;
+
+    clearTimeout(analysisAbortTimers.get(section));
+    analysisAbortTimers.delete(section);
+    detachPage(section);
+}
+
+function scheduleAnalysisAbort(section) {
+    if (analysisAbortTimers.has(section)) return;
+    analysisAbortTimers.set(section, setTimeout(() => {
+        analysisAbortTimers.delete(section);
+        pendingAnalysisIds(section).forEach(imageId => {
+            const controller = analysisControllers.get(imageId);
+            if (controller) controller.abort();
+        });
+    }, ANALYSIS_ABORT_DELAY_MS));
+}
+
+function attachPage(section) {
+    pagesAwaitingDetach.delete(section);
+    const abortTimer = analysisAbortTimers.get(section);
+    if (abortTimer) {
+        clearTimeout(abortTimer);
+        analysisAbortTimers.delete(section);
+    }
+
+    const detached = detachedPages.get(section);
+    if (!detached) return;
+
+    detachedPages.delete(section);
+    section.innerHTML = detached.html;
+    section.style.height = '';
+    observeCardStubs(section);
+
+    // The image size threshold may have changed while the page was detached
+    if (detached.settings !== displaySettingsKey()) {
+        applyMinImageSize(section);
+    }
+}
+
+// Modal functions
+function openModal(imageSrc, page, index, width, height, format, fileSize, hash) {
+    const modal = els.imageModal;
+    const modalImage = els.modalImage;
+    const modalInfo = els.modalImageInfo;
+    
+    if (modal && modalImage && modalInfo) {
+        modalImage.src = imageSrc;
+        modalImage.alt = 'Page ' + page + ' Image ' + index;
+        
+        const info = cloneTemplate('modalInfoTemplate');
+        fillSlot(info, 'page', page);
+        fillSlot(info, 'index', index);
+        fillSlot(info, 'dimensions', width + ' × ' + height);
+        fillSlot(info, 'format', (format || '').toUpperCase());
+        fillSlot(info, 'size', fileSize);
+        if (hash && hash !== 'undefined') {
+            fillSlot(info, 'hash', hash);
+        } else {
+            removeSlot(info, 'hash-row');
+        }
+        fillSlot(info, 'filename', imageSrc.split('/').pop());
+        
+        modalInfo.replaceChildren(info);
+        modal.classList.add('show');
+        document.documentElement.classList.add('modal-open');
+    }
+}
+
+function closeModal() {
+    const modal = els.imageModal;
+    if (modal) {
+        modal.classList.remove('show');
+        document.documentElement.classList.remove('modal-open');
+    }
+}
+
+function openAIModal(analysis) {
+    const modal = els.aiModal;
+    const body = els.aiModalBody;
+
+    if (modal && body) {
+        // Stored analyses may predate the current sanitizer, so clean them again
+        const markdown = document.createElement('template');
+        markdown.innerHTML = analysis;
+        sanitizeAnalysis(markdown.content);
+        body.replaceChildren(markdown.content);
+        modal.classList.add('show');
+        document.documentElement.classList.add('modal-open');
+    }
+}
+
+function closeAIModal() {
+    const modal = els.aiModal;
+    if (modal) {
+        modal.classList.remove('show');
+        document.documentElement.classList.remove('modal-open');
+    }
+}
+
+// One document click listener serves every data-action element (image cards, server-rendered
+// or lazily built, and the modals); the card's <img> data attributes carry what the modal shows
+function handleClick(event) {
+    // Clicking a modal's backdrop closes it
+    if (event.target === els.imageModal) {
+        closeModal();
+        return;
+    }
+    if (event.target === els.aiModal) {
+        closeAIModal();
+        return;
+    }
+
+    const target = event.target.closest('[data-action]');
+    if (!target) return;
+
+    const action = target.dataset.action;
+    if (action === 'analyze-image') {
+        analyzeImageFromButton(target, event);
+    } else if (action === 'toggle-analysis') {
+        toggleAnalysis(target.id.slice('btn-'.length));
+    } else if (action === 'open-modal') {
+        const img = target.querySelector('img');
+        if (!img) return;
+        const data = img.dataset;
+        openModal('images/' + data.imageFilename, data.page, data.index, data.width, data.height,
+            data.format, data.size, (data.imageHash || '').substring(0, 8));
+    } else if (action === 'open-ai-modal') {
+        openAIModal(getCachedAnalysis(target.dataset.imageId));
+    } else if (action === 'close-modal') {
+        closeModal();
+    } else if (action === 'close-ai-modal') {
+        closeAIModal();
+    }
+}
+
+// AI Analysis functions
+function analyzeImageFromButton(button, event) {
+    event.stopPropagation();
+    const img = button.parentElement.querySelector('img');
+    if (img) {
+        const imageId = img.dataset.imageId;
+        toggleAnalysis(imageId);
+    }
+}
+
+// Map-backed LRU: Map keeps insertion order, so a hit is re-inserted at the end and
+// the first key is always the least recently used
+function lruGet(cache, key) {
+    if (!cache.has(key)) return undefined;
+    const value = cache.get(key);
+    cache.delete(key);
+    cache.set(key, value);
+    return value;
+}
+
+function lruSet(cache, key, value, capacity) {
+    cache.delete(key);
+    cache.set(key, value);
+    if (cache.size > capacity) {
+        cache.delete(cache.keys().next().value);
+    }
+}
+
+function djb2(text) {
+    let hash = 5381;
+    for (let i = 0; i < text.length; i++) {
+        hash = ((hash << 5) + hash + text.charCodeAt(i)) | 0;
+    }
+    return (hash >>> 0).toString(36);
+}
+
+function requestPromise(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// Opened once on first use; resolves to null where IndexedDB is unavailable (e.g. some file:// contexts)
+function openAnalysisDB() {
+    if (!analysisDB) {
+        analysisDB = new Promise(resolve => {
+            try {
+                const request = indexedDB.open(ANALYSIS_DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    const store = request.result.createObjectStore(ANALYSIS_DB_STORE, { keyPath: 'hash' });
+                    store.createIndex('ts', 'ts');
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => {
+                    console.warn('Could not open analysis store:', request.error);
+                    resolve(null);
+                };
+            } catch (error) {
+                console.warn('Could not open analysis store:', error);
+                resolve(null);
+            }
+        });
+    }
+    return analysisDB;
+}
+
+async function idbGetAnalysis(hash) {
+    if (hash.startsWith(SCREENSHOT_HASH_PREFIX)) return undefined;
+    const db = await openAnalysisDB();
+    if (!db) return undefined;
+    try {
+        const store = db.transaction(ANALYSIS_DB_STORE, 'readwrite').objectStore(ANALYSIS_DB_STORE);
+        const record = await requestPromise(store.get(ANALYSIS_KEY_PREFIX + hash));
+        if (!record) return undefined;
+        // Touch the entry so eviction stays least-recently-used
+        record.ts = Date.now();
+        store.put(record);
+        return record.content;
+    } catch (error) {
+        console.warn('Could not read stored analysis:', error);
+        return undefined;
+    }
+}
+
+async function idbPutAnalysis(hash, content) {
+    if (hash.startsWith(SCREENSHOT_HASH_PREFIX)) return;
+    const db = await openAnalysisDB();
+    if (!db) return;
+    try {
+        const store = db.transaction(ANALYSIS_DB_STORE, 'readwrite').objectStore(ANALYSIS_DB_STORE);
+        store.put({ hash: ANALYSIS_KEY_PREFIX + hash, content, ts: Date.now(), model: GEMINI_MODEL });
+        const excess = await requestPromise(store.count()) - ANALYSIS_DB_LIMIT;
+        if (excess <= 0) return;
+        let removed = 0;
+        const cursorRequest = store.index('ts').openCursor();
+        cursorRequest.onsuccess = () => {
+            const cursor = cursorRequest.result;
+            if (!cursor || removed >= excess) return;
+            cursor.delete();
+            removed++;
+            cursor.continue();
+        };
+    } catch (error) {
+        // Quota exceeded or store unavailable; the in-memory cache still applies
+        console.warn('Could not persist analysis:', error);
+    }
+}
+
+function cacheHashAnalysis(hash, analysis) {
+    lruSet(hashAnalysisCache, hash, analysis, ANALYSIS_CACHE_SIZE);
+    idbPutAnalysis(hash, analysis);
+}
+
+// Looks the image up in the persistent store and shows the stored analysis; true on a hit
+async function showStoredAnalysis(img, imageId) {
+    const hash = img.dataset.imageHash;
+    if (!hash) return false;
+
+    const stored = await idbGetAnalysis(hash);
+    if (stored === undefined) return false;
+
+    lruSet(hashAnalysisCache, hash, stored, ANALYSIS_CACHE_SIZE);
+    lruSet(analysisCache, imageId, stored, ANALYSIS_CACHE_SIZE);
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    if (analysisDiv) {
+        const node = buildAnalysisNode(imageId, stored);
+        analysisDiv.replaceChildren(node.cloneNode(true));
+        lruSet(analysisNodeCache, imageId, node, ANALYSIS_CACHE_SIZE);
+    }
+    return true;
+}
+
+// Cards are rebuilt when pages are detached and re-attached, so the image is reached through
+// its card's analysis container (an id lookup) instead of a map that could hold stale nodes
+function findImageElement(imageId) {
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    const card = analysisDiv && analysisDiv.closest('.relative.group');
+    return card ? card.querySelector('img') : null;
+}
+
+function getCachedAnalysis(imageId) {
+    const cached = lruGet(analysisCache, imageId);
+    if (cached !== undefined) return cached;
+
+    const img = findImageElement(imageId);
+    if (img && img.dataset.imageHash) {
+        const byHash = lruGet(hashAnalysisCache, img.dataset.imageHash);
+        if (byHash !== undefined) {
+            lruSet(analysisCache, imageId, byHash, ANALYSIS_CACHE_SIZE);
+            return byHash;
+        }
+    }
+    return undefined;
+}
+
+function toggleAnalysis(imageId) {
+    if (!API_KEY) {
+        showError(imageId, 'Please set your Google API key in Settings');
+        return;
+    }
+    
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    const button = document.getElementById('btn-' + imageId);
+    
+    if (!analysisDiv || !button) return;
+    
+    if (!analysisDiv.classList.contains('hidden')) {
+        analysisDiv.classList.add('hidden');
+        button.textContent = 'Analyze';
+        button.classList.remove('bg-purple-200');
+        button.classList.add('bg-purple-100');
+        return;
+    }
+    
+    analysisDiv.classList.remove('hidden');
+    button.textContent = 'Hide';
+    button.classList.add('bg-purple-200');
+    button.classList.remove('bg-purple-100');
+    
+    const cachedNode = getCachedAnalysisNode(imageId);
+    if (cachedNode !== undefined) {
+        analysisDiv.replaceChildren(cachedNode.cloneNode(true));
+        return;
+    }
+    
+    if (analysisInProgress.has(imageId)) return;
+    
+    const img = findImageElement(imageId);
+    if (img) {
+        startAnalysis(img, imageId);
+    }
+}
+
+function startAnalysis(img, imageId) {
+    const filename = img.dataset.imageFilename;
+    
+    if (!filename) {
+        showError(imageId, 'Image filename not available');
+        return;
+    }
+    
+    analysisInProgress.add(imageId);
+    showLoading(imageId);
+
+    const hash = img.dataset.imageHash;
+    const pending = hash ? pendingAnalysesByHash.get(hash) : undefined;
+    if (pending) {
+        pending.catch(() => {}).then(() => showDuplicateAnalysis(imageId));
+        return;
+    }
+
+    const analysis = showStoredAnalysis(img, imageId).then(found => {
+        if (found) {
+            finishAnalysis(imageId);
+        } else {
+            return readImageFile(filename, imageId);
+        }
+    });
+    if (hash) {
+        pendingAnalysesByHash.set(hash, analysis);
+        const clear = () => pendingAnalysesByHash.delete(hash);
+        analysis.then(clear, clear);
+    }
+}
+
+// Shows the result another card with the same image hash just produced
+function showDuplicateAnalysis(imageId) {
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    if (analysisDiv) {
+        const cachedNode = getCachedAnalysisNode(imageId);
+        if (cachedNode !== undefined) {
+            analysisDiv.replaceChildren(cachedNode.cloneNode(true));
+        } else {
+            showError(imageId, 'Analysis of an identical image failed');
+        }
+    }
+    finishAnalysis(imageId);
+}
+
+// Image bytes are fetched and base64-encoded in a worker (built from encodeWorkerMain via a
+// blob URL) so large images don't block the page; the main thread is only the fallback
+function encodeWorkerMain() {
+    const toBase64 = blob => new FileReaderSync().readAsDataURL(blob).split(',')[1];
+    // One canvas for every JPEG re-encode; convertToBlob snapshots it, so it can be resized right away
+    let canvas = null;
+
+    self.onmessage = async (event) => {
+        const { id, url, bitmap } = event.data;
+        try {
+            let blob;
+            if (bitmap) {
+                if (!canvas) {
+                    canvas = new OffscreenCanvas(bitmap.width, bitmap.height);
+                } else {
+                    canvas.width = bitmap.width;
+                    canvas.height = bitmap.height;
+                }
+                canvas.getContext('2d').drawImage(bitmap, 0, 0);
+                bitmap.close();
+                blob = await canvas.convertToBlob({ type: 'image/jpeg', quality: 0.8 });
+            } else {
+                const response = await fetch(url);
+                if (!response.ok) {
+                    throw new Error('Failed to fetch image');
+                }
+                blob = await response.blob();
+            }
+            self.postMessage({ id, data: toBase64(blob) });
+        } catch (error) {
+            self.postMessage({ id, error: error.message });
+        }
+    };
+}
+
+function getEncodeWorker() {
+    if (encodeWorker === null) {
+        try {
+            const source = '(' + encodeWorkerMain.toString() + ')();';
+            encodeWorker = new Worker(URL.createObjectURL(new Blob([source], { type: 'text/javascript' })));
+            encodeWorker.onmessage = (event) => {
+                const { id, data, error } = event.data;
+                const request = encodeRequests.get(id);
+                if (!request) return;
+                encodeRequests.delete(id);
+                if (error) {
+                    request.reject(new Error(error));
+                } else {
+                    request.resolve(data);
+                }
+            };
+            encodeWorker.onerror = () => {
+                // The worker could not start (e.g. blocked on file://); stop using it
+                encodeWorker.terminate();
+                encodeWorker = false;
+                encodeRequests.forEach(request => request.reject(new Error('Encoding worker unavailable')));
+                encodeRequests.clear();
+            };
+        } catch (error) {
+            encodeWorker = false;
+        }
+    }
+    return encodeWorker || null;
+}
+
+function encodeInWorker(message, transfer = []) {
+    const worker = getEncodeWorker();
+    if (!worker) {
+        return Promise.reject(new Error('Encoding worker unavailable'));
+    }
+    return new Promise((resolve, reject) => {
+        const id = ++encodeRequestId;
+        encodeRequests.set(id, { resolve, reject });
+        worker.postMessage({ id, ...message }, transfer);
+    });
+}
+
+async function readImageFile(filename, imageId) {
+    try {
+        const url = new URL('images/' + filename, document.baseURI).href;
+        return analyzeImage(await encodeInWorker({ url }), imageId);
+    } catch (error) {
+        console.warn('Worker image encoding failed, falling back to the main thread:', error.message);
+    }
+
+    try {
+        const response = await fetch('images/' + filename);
+        if (response.ok) {
+            const blob = await response.blob();
+            const base64Data = await blobToBase64(blob);
+            return analyzeImage(base64Data, imageId);
+        }
+        throw new Error('Failed to fetch image');
+    } catch (error) {
+        const img = findImageElement(imageId);
+        if (!img) {
+            showError(imageId, 'Image element not found');
+            finishAnalysis(imageId);
+            return;
+        }
+        
+        if (typeof createImageBitmap === 'function' && typeof OffscreenCanvas !== 'undefined') {
+            try {
+                const bitmap = await createImageBitmap(img);
+                return analyzeImage(await encodeInWorker({ bitmap }, [bitmap]), imageId);
+            } catch (workerError) {
+                // Encode on the main thread below
+            }
+        }
+        
+        // Reuse one canvas for the main-thread fallback; resizing it also clears it
+        if (!fallbackCanvas) {
+            fallbackCanvas = document.createElement('canvas');
+        }
+        fallbackCanvas.width = img.naturalWidth || img.width;
+        fallbackCanvas.height = img.naturalHeight || img.height;
+        fallbackCanvas.getContext('2d').drawImage(img, 0, 0);
+        
+        const dataURL = fallbackCanvas.toDataURL('image/jpeg', 0.8);
+        const base64Data = dataURL.split(',')[1];
+        
+        return analyzeImage(base64Data, imageId);
+    }
+}
+
+function blobToBase64(blob) {
+    return new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = function() {
+            const base64 = reader.result.split(',')[1];
+            resolve(base64);
+        };
+        reader.onerror = reject;
+        reader.readAsDataURL(blob);
+    });
+}
+
+function showLoading(imageId) {
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    if (analysisDiv) {
+        analysisDiv.replaceChildren(cloneTemplate('analysisLoadingTemplate'));
+    }
+}
+
+// marked.js is only needed once an analysis comes back, so fetch it on first use;
+// resolves with its parse function, looked up once when the script has loaded
+function loadMarked() {
+    if (!markedLoader) {
+        markedLoader = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = MARKED_URL;
+            script.onload = () => resolve(typeof marked.parse === 'function' ? marked.parse.bind(marked) : marked);
+            script.onerror = () => {
+                markedLoader = null;
+                reject(new Error('Failed to load marked.js'));
+            };
+            document.head.appendChild(script);
+        });
+    }
+    return markedLoader;
+}
+
+// Markdown is parsed in a worker (built from markdownWorkerMain via a blob URL) so long
+// answers don't stall the page; marked.js on the main thread is the fallback
+function markdownWorkerMain(markedUrl) {
+    importScripts(markedUrl);
+
+    self.onmessage = (event) => {
+        const { id, text } = event.data;
+        try {
+            self.postMessage({ id, html: marked.parse(text) });
+        } catch (error) {
+            self.postMessage({ id, error: String(error) });
+        }
+    };
+}
+
+function getMarkdownWorker() {
+    if (markdownWorker === null) {
+        try {
+            const source = '(' + markdownWorkerMain.toString() + ')(' + JSON.stringify(MARKED_URL) + ');';
+            markdownWorker = new Worker(URL.createObjectURL(new Blob([source], { type: 'text/javascript' })));
+            markdownWorker.onmessage = (event) => {
+                const { id, html, error } = event.data;
+                const request = markdownRequests.get(id);
+                if (!request) return;
+                markdownRequests.delete(id);
+                if (error) {
+                    request.reject(new Error(error));
+                } else {
+                    request.resolve(html);
+                }
+            };
+            markdownWorker.onerror = () => {
+                // marked.js could not be loaded into the worker; parse on the main thread instead
+                markdownWorker.terminate();
+                markdownWorker = false;
+                markdownRequests.forEach(request => request.reject(new Error('Markdown worker unavailable')));
+                markdownRequests.clear();
+            };
+        } catch (error) {
+            markdownWorker = false;
+        }
+    }
+    return markdownWorker || null;
+}
+
+async function renderMarkdown(text) {
+    const worker = getMarkdownWorker();
+    if (worker) {
+        try {
+            return await new Promise((resolve, reject) => {
+                const id = ++markdownRequestId;
+                markdownRequests.set(id, { resolve, reject });
+                worker.postMessage({ id, text });
+            });
+        } catch (error) {
+            console.warn('Markdown worker failed, parsing on the main thread:', error);
+        }
+    }
+
+    // Parsing a long answer here is not free; let pending input and rendering go first
+    const parseMarkdown = await loadMarked();
+    await whenIdle();
+    return parseMarkdown(text);
+}
+
+function whenIdle(timeout = 500) {
+    return new Promise(resolve => {
+        if (window.requestIdleCallback) {
+            requestIdleCallback(() => resolve(), { timeout });
+        } else {
+            setTimeout(resolve, 0);
+        }
+    });
+}
+
+// Model output is rendered as HTML, so only the markup marked.js emits survives: elements that
+// carry script or foreign content are dropped, other unknown tags are unwrapped to their text
+const ANALYSIS_ALLOWED_TAGS = new Set([
+    'A', 'B', 'BLOCKQUOTE', 'BR', 'CODE', 'DEL', 'EM', 'H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'HR', 'I',
+    'IMG', 'INPUT', 'LI', 'OL', 'P', 'PRE', 'S', 'STRONG', 'TABLE', 'TBODY', 'TD', 'TH', 'THEAD', 'TR', 'UL'
+]);
+const ANALYSIS_DROPPED_TAGS = 'script, style, template, iframe, frame, object, embed, link, meta, base, ' +
+    'form, button, textarea, select, noscript, svg, math';
+const ANALYSIS_ALLOWED_ATTRIBUTES = new Set(['href', 'src', 'alt', 'title', 'align', 'start', 'type', 'checked', 'disabled']);
+const ANALYSIS_URL_ATTRIBUTES = new Set(['href', 'src']);
+const ANALYSIS_URL_SCHEMES = new Set(['http', 'https', 'mailto']);
+
+// Browsers ignore ASCII whitespace and control characters inside a URL scheme, so they are
+// removed before it is read; URLs without a scheme are relative and allowed
+function isSafeAnalysisUrl(value) {
+    const scheme = /^([a-z][a-z0-9+.-]*):/i.exec(value.replace(/[\u0000-\u0020\u007f]/g, ''));
+    return !scheme || ANALYSIS_URL_SCHEMES.has(scheme[1].toLowerCase());
+}
+
+function sanitizeAnalysis(root) {
+    root.querySelectorAll(ANALYSIS_DROPPED_TAGS).forEach(el => el.remove());
+    root.querySelectorAll('*').forEach(el => {
+        if (!ANALYSIS_ALLOWED_TAGS.has(el.tagName)) {
+            el.replaceWith(...el.childNodes);
+            return;
+        }
+        Array.from(el.attributes).forEach(attr => {
+            const name = attr.name.toLowerCase();
+            if (!ANALYSIS_ALLOWED_ATTRIBUTES.has(name) ||
+                    (ANALYSIS_URL_ATTRIBUTES.has(name) && !isSafeAnalysisUrl(attr.value))) {
+                el.removeAttribute(attr.name);
+            }
+        });
+        if (el.tagName === 'INPUT' && el.type !== 'checkbox') {
+            el.remove();
+        }
+    });
+}
+
+// Build the analysis panel once from parsed markdown; later displays clone the node
+function buildAnalysisNode(imageId, parsedAnalysis) {
+    const markdown = document.createElement('template');
+    markdown.innerHTML = parsedAnalysis;
+    sanitizeAnalysis(markdown.content);
+
+    const node = cloneTemplate('analysisTemplate');
+    const body = node.querySelector('[data-slot="markdown"]');
+    body.appendChild(markdown.content);
+
+    if (body.textContent.length > 400) {
+        node.querySelector('[data-slot="more"] button').dataset.imageId = imageId;
+    } else {
+        node.querySelector('.analysis-content').classList.add('expanded');
+        removeSlot(node, 'more');
+    }
+    return node;
+}
+
+function getCachedAnalysisNode(imageId) {
+    const cachedNode = lruGet(analysisNodeCache, imageId);
+    if (cachedNode !== undefined) return cachedNode;
+
+    const cachedAnalysis = getCachedAnalysis(imageId);
+    if (cachedAnalysis === undefined) return undefined;
+
+    const node = buildAnalysisNode(imageId, cachedAnalysis);
+    lruSet(analysisNodeCache, imageId, node, ANALYSIS_CACHE_SIZE);
+    return node;
+}
+
+async function showAnalysis(imageId, analysis) {
+    let parsedAnalysis;
+    try {
+        parsedAnalysis = await renderMarkdown(analysis);
+    } catch (error) {
+        console.error('Markdown parsing error:', error);
+        parsedAnalysis = analysis.replace(/\n/g, '<br>');
+    }
+    
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    if (analysisDiv) {
+        const node = buildAnalysisNode(imageId, parsedAnalysis);
+        const safeAnalysis = node.querySelector('[data-slot="markdown"]').innerHTML;
+        analysisDiv.replaceChildren(node.cloneNode(true));
+        lruSet(analysisNodeCache, imageId, node, ANALYSIS_CACHE_SIZE);
+        lruSet(analysisCache, imageId, safeAnalysis, ANALYSIS_CACHE_SIZE);
+        
+        const img = findImageElement(imageId);
+        if (img && img.dataset.imageHash) {
+            cacheHashAnalysis(img.dataset.imageHash, safeAnalysis);
+        }
+    }
+}
+
+function toggleAnalysisExpansion(imageId) {
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    if (!analysisDiv) return;
+    
+    const content = analysisDiv.querySelector('.analysis-content');
+    const button = analysisDiv.querySelector('.expand-pill');
+    
+    if (content && button) {
+        if (content.classList.contains('expanded')) {
+            content.classList.remove('expanded');
+            button.textContent = 'Show More';
+        } else {
+            content.classList.add('expanded');
+            button.textContent = 'Show Less';
+        }
+    }
+}
+
+function showError(imageId, errorMessage) {
+    const analysisDiv = document.getElementById('analysis-' + imageId);
+    if (analysisDiv) {
+        const node = cloneTemplate('analysisErrorTemplate');
+        fillSlot(node, 'message', errorMessage);
+        analysisDiv.replaceChildren(node);
+    }
+}
+
+// Gemini requests go through one queue so at most AI_CONCURRENCY are in flight; rate
+// limits and server errors are retried with backoff instead of failing the analysis
+function enqueueGeminiRequest(requestBody, onText, signal) {
+    return new Promise((resolve, reject) => {
+        geminiQueue.pending.push({ requestBody, onText, signal, resolve, reject });
+        pumpGeminiQueue();
+    });
+}
+
+function pumpGeminiQueue() {
+    while (geminiQueue.active < AI_CONCURRENCY && geminiQueue.pending.length > 0) {
+        const job = geminiQueue.pending.shift();
+        // Requests cancelled while queued never reach the network
+        if (job.signal && job.signal.aborted) {
+            job.reject(job.signal.reason);
+            continue;
+        }
+        geminiQueue.active++;
+        sendGeminiRequest(job.requestBody, job.onText, job.signal)
+            .then(job.resolve, job.reject)
+            .finally(() => {
+                geminiQueue.active--;
+                pumpGeminiQueue();
+            });
+    }
+}
+
+function geminiRetryDelay(response, attempt) {
+    // Retry-After is either a number of seconds or an HTTP date
+    const retryAfter = response.headers.get('Retry-After');
+    if (retryAfter) {
+        const seconds = Number(retryAfter);
+        if (!isNaN(seconds)) return seconds * 1000;
+        const date = Date.parse(retryAfter);
+        if (!isNaN(date)) return Math.max(0, date - Date.now());
+    }
+    return Math.min(GEMINI_MAX_RETRY_DELAY_MS, 2 ** attempt * 500 + Math.random() * 250);
+}
+
+// Resolves with the full answer text; onText receives each chunk as it streams in
+// Rebuilt only when the API key changes; URLSearchParams escapes the key
+function getGeminiRequestUrl() {
+    if (geminiRequestUrl.apiKey !== API_KEY) {
+        const url = new URL(GEMINI_API_URL);
+        url.searchParams.set('key', API_KEY);
+        geminiRequestUrl = { apiKey: API_KEY, href: url.href };
+    }
+    return geminiRequestUrl.href;
+}
+
+async function sendGeminiRequest(requestBody, onText, signal) {
+    for (let attempt = 0; ; attempt++) {
+        const response = await fetch(getGeminiRequestUrl(), {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: requestBody,
+            signal
+        });
+        
+        if (response.ok) {
+            return readGeminiStream(response, onText);
+        }
+        
+        const retryable = response.status === 429 || response.status >= 500;
+        if (!retryable || attempt >= GEMINI_MAX_RETRIES) {
+            throw new Error('API request failed');
+        }
+        
+        const delay = geminiRetryDelay(response, attempt);
+        console.warn(`Gemini request failed with ${response.status}, retrying in ${Math.round(delay)}ms`);
+        await abortableDelay(delay, signal);
+    }
+}
+
+function abortableDelay(ms, signal) {
+    return new Promise((resolve, reject) => {
+        if (!signal) {
+            setTimeout(resolve, ms);
+            return;
+        }
+        if (signal.aborted) {
+            reject(signal.reason);
+            return;
+        }
+        const timer = setTimeout(() => {
+            signal.removeEventListener('abort', onAbort);
+            resolve();
+        }, ms);
+        const onAbort = () => {
+            clearTimeout(timer);
+            reject(signal.reason);
+        };
+        signal.addEventListener('abort', onAbort, { once: true });
+    });
+}
+
+function geminiEventText(line) {
+    line = line.trim();
+    if (!line.startsWith('data:')) return '';
+    const event = JSON.parse(line.slice(5));
+    const candidate = event.candidates && event.candidates[0];
+    const parts = candidate && candidate.content && candidate.content.parts;
+    return parts ? parts.map(part => part.text || '').join('') : '';
+}
+
+async function readGeminiStream(response, onText) {
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffered = '';
+    let text = '';
+    const consume = line => {
+        const delta = geminiEventText(line);
+        if (delta) {
+            text += delta;
+            if (onText) onText(delta);
+        }
+    };
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += value;
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.forEach(consume);
+    }
+    consume(buffered);
+
+    if (!text) {
+        throw new Error('Invalid response format');
+    }
+    return text;
+}
+
+// Shows streamed text as plain text until the full answer is rendered as Markdown;
+// deltas are coalesced into one DOM write per animation frame
+function streamAnalysisText(imageId) {
+    let target = null;
+    let pending = '';
+    let frame = 0;
+
+    const flush = () => {
+        frame = 0;
+        // A frame that fires after the final render or an error must not overwrite it
+        if (!analysisInProgress.has(imageId)) return;
+        if (!target) {
+            const analysisDiv = document.getElementById('analysis-' + imageId);
+            if (!analysisDiv) return;
+            const content = document.createElement('div');
+            content.className = 'analysis-content';
+            target = document.createElement('div');
+            target.className = 'text-xs text-gray-700 leading-relaxed whitespace-pre-wrap';
+            content.appendChild(target);
+            analysisDiv.replaceChildren(content);
+        }
+        target.insertAdjacentText('beforeend', pending);
+        pending = '';
+    };
+
+    return delta => {
+        pending += delta;
+        if (!frame) frame = requestAnimationFrame(flush);
+    };
+}
+
+async function analyzeImage(base64Data, imageId) {
+    const controller = new AbortController();
+    analysisControllers.set(imageId, controller);
+    try {
+        if (!API_KEY) {
+            throw new Error('No API key provided');
+        }
+        
+        if (!base64Data || base64Data.length < 100) {
+            throw new Error('Invalid image data');
+        }
+        
+        // Encoded to UTF-8 once here; retries resend the same bytes instead of re-encoding the string
+        const requestBody = new Blob([GEMINI_BODY_PREFIX, base64Data, GEMINI_BODY_SUFFIX], { type: 'application/json' });
+        
+        // Start the Markdown worker (and its marked.js download) alongside the API request
+        getMarkdownWorker();
+        
+        const analysis = await enqueueGeminiRequest(requestBody, streamAnalysisText(imageId), controller.signal);
+        await showAnalysis(imageId, analysis);
+        
+    } catch (error) {
+        if (error && error.name === 'AbortError') {
+            showError(imageId, 'Analysis cancelled');
+        } else {
+            showError(imageId, error.message || 'Unknown error occurred');
+        }
+    } finally {
+        analysisControllers.delete(imageId);
+        finishAnalysis(imageId);
+    }
+}
+
+// Initialization
+document.addEventListener('DOMContentLoaded', async function() {
+    debugLog('Enhanced PDF Extractor Report loaded');
+    debugLog('Features: Lazy loading, Configurable settings, Modal view, AI analysis with markdown, Pixel similarity detection');
+    debugLog('Duplicate detection: Hash-based + 99% pixel similarity');
+    
+    // Load saved settings FIRST
+    cacheElements();
+    document.addEventListener('click', handleClick);
+    loadSettings();
+    
+    // Write out any pending settings change and cancel running analyses before the page goes away
+    window.addEventListener('pagehide', () => {
+        if (saveTimer) flushSettings();
+        analysisControllers.forEach(controller => controller.abort());
+    });
+    
+    // Load pages data for lazy loading
+    const dataLoaded = await loadPagesData();
+    if (dataLoaded) {
+        debugLog(`Data loaded for ${totalPages} pages`);
+        
+        // Set initial loaded pages count based on what's already rendered
+        const initialPages = document.querySelectorAll('#initialPages .page-section');
+        currentLoadedPages = initialPages.length;
+        
+        animatePagesIn(initialPages);
+        
+        // Show load more button if there are more pages
+        if (currentLoadedPages < totalPages) {
+            const loadContainer = els.loadMoreContainer;
+            if (loadContainer) {
+                loadContainer.style.display = 'block';
+                const remaining = totalPages - currentLoadedPages;
+                const nextChunkSize = Math.min(PAGES_PER_CHUNK, remaining);
+                const loadBtn = els.loadMoreBtn;
+                if (loadBtn) {
+                    loadBtn.innerHTML = `Load More Pages (${nextChunkSize} more)`;
+                }
+            }
+        } else {
+            // All pages are already loaded, show end indicator
+            const endIndicator = els.endIndicator;
+            if (endIndicator) {
+                endIndicator.style.display = 'block';
+            }
+        }
+    } else {
+        console.warn('Could not load pages data for lazy loading');
+        // Hide loading indicator if data couldn't be loaded
+        const loadingIndicator = els.loadingIndicator;
+        if (loadingIndicator) {
+            loadingIndicator.style.display = 'none';
+        }
+    }
+    
+    // Detach offscreen pages, including the ones rendered into the report
+    setupPageVisibilityObserver();
+    setupCardObserver();
+    
+    // Hide loading indicator
+    const loadingIndicator = els.loadingIndicator;
+    if (loadingIndicator) {
+        setTimeout(() => {
+            loadingIndicator.style.display = 'none';
+        }, 1000);
+    }
+    
+    // Applying settings to the rendered pages (and starting the auto-load observer) can
+    // wait until the first paint is done and the main thread is idle
+    whenIdle(2000).then(() => {
+        applySettingsToUI();
+        debugLog('Settings applied to UI');
+    });
+    
+    // Add keyboard shortcuts
+    document.addEventListener('keydown', function(e) {
+        // Keys typed into a settings field are not shortcuts; ESC just leaves the field
+        const target = e.target;
+        if (target.tagName === 'INPUT' || target.tagName === 'TEXTAREA' || target.isContentEditable) {
+            if (e.key === 'Escape') target.blur();
+            return;
+        }
+        
+        switch (e.key) {
+            case 'Escape': {
+                closeModal();
+                const panel = els.settingsPanel;
+                if (panel && panel.classList.contains('show')) {
+                    toggleSettings();
+                }
+                break;
+            }
+            // Ctrl/Cmd + S to save settings
+            case 's':
+                if (e.ctrlKey || e.metaKey) {
+                    e.preventDefault();
+                    saveSettings();
+                }
+                break;
+            // Ctrl/Cmd + L to load more pages
+            case 'l':
+                if (e.ctrlKey || e.metaKey) {
+                    e.preventDefault();
+                    loadMorePages();
+                }
+                break;
+        }
+    });
+    
+    debugLog('Keyboard shortcuts: ESC (close modals), Ctrl+S (save settings), Ctrl+L (load more pages)');
+});
+
+// Window load event for final setup
+// The small images setting is restored by loadSettings and applied by applySettingsToUI
+window.addEventListener('load', function() {
+    debugLog('All resources loaded, report ready!');
+});
+
+// Debug function to check current state
+function debugSettingsState() {
+    console.log('=== SETTINGS DEBUG ===');
+    console.log('API_KEY:', API_KEY ? `"${API_KEY.substring(0, 10)}..." (${API_KEY.length} chars)` : 'NOT SET');
+    console.log('MIN_IMAGE_SIZE:', MIN_IMAGE_SIZE);
+    console.log('PAGES_PER_CHUNK:', PAGES_PER_CHUNK);
+    console.log('AI_CONCURRENCY:', AI_CONCURRENCY);
+    console.log('AUTO_LOAD_ENABLED:', AUTO_LOAD_ENABLED);
+    
+    // Check UI elements
+    const apiInput = els.apiKeyInput;
+    console.log('API Input value:', apiInput ? `"${apiInput.value.substring(0, 10)}..." (${apiInput.value.length} chars)` : 'NOT FOUND');
+    
+    // Check AI elements and small image containers in a single pass
+    let aiButtons = 0, aiSections = 0, smallContainers = 0;
+    let visibleButtons = 0, visibleSections = 0, visibleSmallContainers = 0;
+    const elements = document.querySelectorAll('.ai-analysis-button, .ai-analysis-section, .small-images');
+    for (let i = 0; i < elements.length; i++) {
+        const element = elements[i];
+        const visible = getComputedStyle(element).display !== 'none';
+        if (element.classList.contains('ai-analysis-button')) {
+            aiButtons++;
+            if (visible) visibleButtons++;
+        } else if (element.classList.contains('ai-analysis-section')) {
+            aiSections++;
+            if (visible) visibleSections++;
+        } else {
+            smallContainers++;
+            if (visible) visibleSmallContainers++;
+        }
+    }
+    
+    console.log('AI buttons found:', aiButtons);
+    console.log('AI sections found:', aiSections);
+    console.log('Visible AI buttons:', visibleButtons);
+    console.log('Visible AI sections:', visibleSections);
+    console.log('Small image containers:', smallContainers);
+    console.log('Visible small containers:', visibleSmallContainers);
+    
+    console.log('=== END DEBUG ===');
+}
+
+// Export functions for global access
+window.debugSettingsState = debugSettingsState;
+window.toggleSettings = toggleSettings;
+window.updateAPIKey = updateAPIKey;
+window.updateMinImageSize = updateMinImageSize;
+window.updatePagesPerChunk = updatePagesPerChunk;
+window.updateAIConcurrency = updateAIConcurrency;
+window.scheduleSliderUpdate = scheduleSliderUpdate;
+window.saveSettings = saveSettings;
+window.resetSettings = resetSettings;
+window.toggleAutoLoad = toggleAutoLoad;
+window.toggleSmallImages = toggleSmallImages;
+window.loadMorePages = loadMorePages;
+window.openModal = openModal;
+window.closeModal = closeModal;
+window.openAIModal = openAIModal;
+window.closeAIModal = closeAIModal;
+window.analyzeImageFromButton = analyzeImageFromButton;
+window.toggleAnalysis = toggleAnalysis;
+window.toggleAnalysisExpansion = toggleAnalysisExpansion;
+window.getCachedAnalysis = getCachedAnalysis;
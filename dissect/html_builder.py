@@ -3,32 +3,159 @@ Enhanced HTML Builder Module
 Builds HTML reports with lazy loading and improved functionality
 """
 
+import gzip
 import hashlib
+import html
 import json
 import logging
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson  # Optional: much faster JSON serialization for large documents
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash  # Optional: fast non-cryptographic hashing for fallback image hashes
+except ImportError:
+    xxhash = None
+
+try:
+    import brotli  # Optional: brotli-compressed copy of the report alongside the gzip one
+except ImportError:
+    brotli = None
 
 from html_template import HTMLTemplate
+from utils import compute_phash
+
+# Maximum Hamming distance between pHashes for two images to be considered similar
+PHASH_THRESHOLD = 5
+
+# Output buffer size for writing the HTML report
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Image card markup that does not depend on the image, built once at import
+IMAGE_CARD_CLASS = "img-card bg-white rounded-lg border border-gray-200 overflow-hidden shadow-sm hover:shadow-md transition-shadow"
+SMALL_IMAGE_CLASSES = ("w-full h-20 object-contain clickable-image hover:scale-105 transition-transform duration-200", "p-2")
+SCREENSHOT_IMAGE_CLASSES = ("w-full h-auto object-contain clickable-image", "p-3")
+REGULAR_IMAGE_CLASSES = ("w-full h-48 object-contain clickable-image hover:scale-105 transition-transform duration-200", "p-3")
+UNIQUE_INDICATOR = """
+                    <div class="indicator uniq">
+                        UNIQUE
+                    </div>
+                """
+
+
+# Static fragments shared by every page and card
+AI_BUTTON_HTML = """
+            <button 
+                class="absolute top-2 right-2 bg-gradient-to-r from-purple-500 to-pink-500 hover:from-purple-600 hover:to-pink-600 text-white px-3 py-1 rounded-full text-xs font-semibold opacity-0 group-hover:opacity-100 transition-all duration-200 flex items-center space-x-1 cursor-pointer shadow-lg ai-analysis-button"
+                data-action="analyze-image"
+                title="Click for AI analysis"
+            >
+                <svg class="w-3 h-3"><use href="#i-bolt"></use></svg>
+                <span>AI</span>
+            </button>
+        """
+NO_SCREENSHOT_HTML = """
+            <div class="bg-gray-50 rounded-lg p-8 text-center">
+                <p class="text-gray-500">No screenshot available</p>
+            </div>
+            """
+NO_IMAGES_HTML = """
+            <div class="bg-gray-50 rounded-lg p-8 text-center">
+                <svg class="w-12 h-12 text-gray-400 mx-auto mb-4"><use href="#i-image"></use></svg>
+                <p class="text-gray-500">No images found on this page</p>
+            </div>
+            """
 
+# Number of characters of page text shown in the report
+TEXT_PREVIEW_LENGTH = 2000
+
+# Page section layout, formatted once per page with precomputed fragments
+PAGE_SECTION_TEMPLATE = """
+        <div class="bg-white rounded-xl shadow-lg border border-gray-200 overflow-hidden page-section" data-page="{page_num}">
+            <div class="bg-gradient-to-r from-blue-600 to-purple-600 px-6 py-4">
+                <h2 class="text-xl font-semibold text-white flex items-center">
+                    <span class="bg-white bg-opacity-20 rounded-full w-8 h-8 flex items-center justify-center mr-3 text-sm">
+                        {page_num}
+                    </span>
+                    Page {page_num}
+                    <span class="ml-auto flex items-center space-x-3 text-sm">
+                        <span class="bg-white bg-opacity-20 px-2 py-1 rounded-full">
+                            {page_word_count:,} words
+                        </span>
+                        <span class="bg-white bg-opacity-20 px-2 py-1 rounded-full">
+                            {page_token_count:,} tokens
+                        </span>
+                        <span class="bg-white bg-opacity-20 px-2 py-1 rounded-full">
+                            {regular_count} images
+                        </span>
+                        {small_badge}
+                    </span>
+                </h2>
+            </div>
+            
+            <div class="p-6">
+                <div class="grid grid-cols-1 lg:grid-cols-3 gap-8">
+                    <div class="lg:col-span-1">
+                        {screenshot_section}
+                    </div>
+                    <div class="lg:col-span-2 grid grid-cols-1 gap-8">
+                        <div class="space-y-6">
+                            <div>
+                                <h3 class="text-lg font-semibold text-gray-900 mb-3 flex items-center">
+                                    <svg class="w-5 h-5 mr-2 text-blue-600"><use href="#i-doc"></use></svg>
+                                    Text Content
+                                </h3>
+                                <div class="bg-gray-50 rounded-lg p-4 max-h-96 overflow-y-auto">
+                                    <pre class="text-sm text-gray-700 whitespace-pre-wrap font-mono leading-relaxed">{text_preview}</pre>
+                                </div>
+                            </div>
+                        </div>
+
+                        <div class="space-y-6">
+                            {images_section}
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        """
 
 class HTMLBuilder:
     """Builds HTML reports with enhanced features including lazy loading"""
 
     def __init__(self, extraction_result: Dict[str, Any], output_dir: Path,
-                 filename: str, api_key: Optional[str] = None, min_image_size: int = 256):
+                 filename: str, api_key: Optional[str] = None, min_image_size: int = 256,
+                 compress: bool = False):
         self.extraction_result = extraction_result
         self.output_dir = output_dir
         self.filename = filename
         self.api_key = api_key
         self.min_image_size = min_image_size
+        self.compress = compress
         self.logger = logging.getLogger(__name__)
 
         # Process images for duplicates and filtering
         self.unique_images, self.duplicate_groups = self._process_duplicate_images()
+        self._duplicate_roles = self._build_duplicate_roles()
         self.small_images, self.regular_images = self._filter_images_by_size()
 
+        # Index images by page once instead of scanning all images for every page
+        self._images_by_page = defaultdict(list)
+        for img in self.extraction_result['images']:
+            self._images_by_page[img['page']].append(img)
+        self._page_image_partitions = self._partition_page_images()
+
         # Calculate word and token counts
+        self._word_count_cache: Dict[str, int] = {}
         self.doc_word_count = self._count_words(self.extraction_result['text'])
         self.doc_token_count = self._estimate_tokens(self.extraction_result['text'])
 
@@ -37,22 +164,28 @@ class HTMLBuilder:
         self.total_pages = len(self.extraction_result['pages_data'])
 
     def _process_duplicate_images(self) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
-        """Process images to detect duplicates by hash and pixel similarity"""
+        """Process images to detect duplicates by hash and perceptual (pHash) similarity"""
         unique_images = []
         duplicate_groups = {}
         seen_hashes = {}
-        processed_images = []
+
+        # Multi-index hashing: split each 64-bit pHash into PHASH_THRESHOLD + 1 bands.
+        # Two hashes within the threshold must agree exactly on at least one band,
+        # so only images sharing a band value need a Hamming comparison.
+        band_count = PHASH_THRESHOLD + 1
+        band_bits = [64 // band_count + (1 if i < 64 % band_count else 0) for i in range(band_count)]
+        phash_buckets = {}
+
+        self._precompute_phashes()
 
         for img in self.extraction_result['images']:
             if not img.get('filename'):
                 continue
 
-            # Calculate hash from image data or use provided hash
+            # Use provided hash, only hashing the image file when it is missing
             img_hash = img.get('hash')
             if not img_hash:
-                # If no hash provided, create one from filename and size
-                img_hash = hashlib.md5(f"{img['filename']}{img.get('size_bytes', 0)}".encode()).hexdigest()
-                img['hash'] = img_hash
+                img_hash = img['hash'] = self._fallback_image_hash(img)
 
             # First check for exact hash matches
             if img_hash in seen_hashes:
@@ -61,89 +194,133 @@ class HTMLBuilder:
                 if img_hash not in duplicate_groups:
                     duplicate_groups[img_hash] = [original_img]
                 duplicate_groups[img_hash].append(img)
-            else:
-                # Check for pixel similarity with existing images
-                similarity_found = False
-                for existing_img in processed_images:
-                    if self._are_images_similar(img, existing_img):
-                        # Found similar image - group them
-                        existing_hash = existing_img.get('hash')
-                        if existing_hash not in duplicate_groups:
-                            duplicate_groups[existing_hash] = [existing_img]
-                        duplicate_groups[existing_hash].append(img)
-                        similarity_found = True
+                continue
+
+            # Check for perceptual similarity with candidates sharing a pHash band
+            phash = self._get_phash(img)
+            band_keys = []
+            similar_img = None
+            if phash is not None:
+                shift = 0
+                for band, bits in enumerate(band_bits):
+                    band_keys.append((band, (phash >> shift) & ((1 << bits) - 1)))
+                    shift += bits
+
+                for key in band_keys:
+                    for candidate_phash, candidate in phash_buckets.get(key, ()):
+                        # int.bit_count() is a single C-level popcount
+                        if (phash ^ candidate_phash).bit_count() <= PHASH_THRESHOLD:
+                            similar_img = candidate
+                            break
+                    if similar_img is not None:
                         break
 
-                if not similarity_found:
-                    # This is unique
-                    seen_hashes[img_hash] = img
-                    unique_images.append(img)
-                    processed_images.append(img)
+            if similar_img is not None:
+                # Found similar image - group them
+                existing_hash = similar_img['hash']
+                if existing_hash not in duplicate_groups:
+                    duplicate_groups[existing_hash] = [similar_img]
+                duplicate_groups[existing_hash].append(img)
+            else:
+                # This is unique
+                seen_hashes[img_hash] = img
+                unique_images.append(img)
+                for key in band_keys:
+                    phash_buckets.setdefault(key, []).append((phash, img))
 
         return unique_images, duplicate_groups
 
-    def _are_images_similar(self, img1: Dict[str, Any], img2: Dict[str, Any]) -> bool:
-        """Check if two images are similar (99% pixel similarity)"""
-        # Basic similarity check based on dimensions and file size
-        # In a full implementation, this would load and compare actual pixel data
-
-        # If dimensions are very different, they're not similar
-        w1, h1 = img1.get('width', 0), img1.get('height', 0)
-        w2, h2 = img2.get('width', 0), img2.get('height', 0)
+    def _fallback_image_hash(self, img: Dict[str, Any]) -> str:
+        """Create an identity hash from the image bytes; only equality matters, so no crypto is needed.
 
-        if w1 == 0 or h1 == 0 or w2 == 0 or h2 == 0:
-            return False
-
-        # Check if dimensions are similar (within 5% tolerance)
-        width_diff = abs(w1 - w2) / max(w1, w2)
-        height_diff = abs(h1 - h2) / max(h1, h2)
-
-        if width_diff > 0.05 or height_diff > 0.05:
-            return False
-
-        # Check if file sizes are similar (within 10% tolerance)
-        size1 = img1.get('size_bytes', 0)
-        size2 = img2.get('size_bytes', 0)
+        The hash also keys analyses stored across reports in the browser, so it
+        must follow the content; filename and size are used only if the file is unreadable.
+        """
+        try:
+            key = (self.output_dir / "images" / img['filename']).read_bytes()
+        except OSError:
+            key = f"{img['filename']}{img.get('size_bytes', 0)}".encode()
+        if xxhash is not None:
+            return xxhash.xxh3_128_hexdigest(key)
+        return hashlib.md5(key).hexdigest()
+
+    def _build_duplicate_roles(self) -> Dict[int, Tuple[str, int]]:
+        """Map each grouped image (by id) to its role ('duplicate' or 'similar') and group size"""
+        roles = {}
+        for img_hash, duplicates in self.duplicate_groups.items():
+            for img in duplicates:
+                role = 'duplicate' if img['hash'] == img_hash else 'similar'
+                roles[id(img)] = (role, len(duplicates))
+        return roles
+
+    def _precompute_phashes(self) -> None:
+        """Compute pHashes the extractor did not provide in parallel.
+
+        Pillow releases the GIL while decoding and resizing, so threads overlap
+        the file I/O and image work. Repeats of an already seen hash are skipped
+        since they are grouped as exact duplicates without a pHash.
+        """
+        missing = []
+        seen_hashes = set()
+        for img in self.extraction_result['images']:
+            if not img.get('filename'):
+                continue
+            img_hash = img.get('hash')
+            if img_hash and img_hash in seen_hashes:
+                continue
+            seen_hashes.add(img_hash)
+            if 'phash' not in img:
+                missing.append(img)
 
-        if size1 > 0 and size2 > 0:
-            size_diff = abs(size1 - size2) / max(size1, size2)
-            if size_diff > 0.10:
-                return False
+        if len(missing) < 2:
+            return
 
-        # Check if formats are the same
-        if img1.get('format') != img2.get('format'):
-            return False
+        paths = [self.output_dir / "images" / img['filename'] for img in missing]
+        with ThreadPoolExecutor() as executor:
+            for img, phash in zip(missing, executor.map(compute_phash, paths)):
+                img['phash'] = phash
 
-        # If all basic checks pass, consider them similar
-        return True
+    def _get_phash(self, img: Dict[str, Any]) -> Optional[int]:
+        """Get the 64-bit perceptual hash of an image, computing it from disk if the extractor did not"""
+        if 'phash' not in img:
+            img['phash'] = compute_phash(self.output_dir / "images" / img['filename'])
+        return int(img['phash'], 16) if img['phash'] else None
 
     def _filter_images_by_size(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """Filter images by size - separate small UI elements from regular images"""
-        small_images = []
-        regular_images = []
         min_area = self.min_image_size * self.min_image_size
 
-        for img in self.extraction_result['images']:
-            if not img.get('filename'):
-                continue
+        # Compute the area mask once for all images; it is reused for the per-page
+        # partitions. Images with an area smaller than min_area are considered small/UI elements
+        self._small_mask = [
+            img.get('width', 0) * img.get('height', 0) < min_area
+            for img in self.extraction_result['images']
+        ]
 
-            width = img.get('width', 0)
-            height = img.get('height', 0)
-            area = width * height
-
-            # Images with an area smaller than min_area are considered small/UI elements
-            if area < min_area:
-                small_images.append(img)
-            else:
-                regular_images.append(img)
+        small_images = []
+        regular_images = []
+        for img, is_small in zip(self.extraction_result['images'], self._small_mask):
+            if img.get('filename'):
+                (small_images if is_small else regular_images).append(img)
 
         return small_images, regular_images
 
+    def _partition_page_images(self) -> Dict[int, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Split each page's images into (regular, small) lists in a single walk using the size mask"""
+        partitions = {}
+        for img, is_small in zip(self.extraction_result['images'], self._small_mask):
+            regular_page_images, small_page_images = partitions.setdefault(img['page'], ([], []))
+            (small_page_images if is_small else regular_page_images).append(img)
+        return partitions
+
     def _count_words(self, text: str) -> int:
-        """Count words in text"""
+        """Count words in text, memoized since each page's text is counted more than once"""
         if not text:
             return 0
-        return len(text.split())
+        word_count = self._word_count_cache.get(text)
+        if word_count is None:
+            word_count = self._word_count_cache[text] = len(text.split())
+        return word_count
 
     def _estimate_tokens(self, text: str) -> int:
         """Estimate token count (rough approximation: 1 token ≈ 4 characters)"""
@@ -156,60 +333,29 @@ class HTMLBuilder:
         self.logger.info("Starting HTML report generation...")
 
         try:
-            # Build all components
-            self.logger.info("Generating modal template...")
-            modal = HTMLTemplate.get_modal_template()
-
-            self.logger.info("Generating settings template...")
-            settings = HTMLTemplate.get_settings_template()
-
-            self.logger.info("Generating header template...")
-            header = HTMLTemplate.get_header_template(
-                self.filename,
-                self.extraction_result['pages'],
-                len(self.unique_images)
-            )
-
-            self.logger.info("Generating stats template...")
-            stats = HTMLTemplate.get_stats_template(
-                self.extraction_result['pages'],
-                self.doc_word_count,
-                self.doc_token_count,
-                len(self.regular_images),
-                len(self.small_images),
-                len(self.unique_images),
-                len(self.extraction_result['images']) - len(self.unique_images),
-                self.min_image_size
-            )
-
-            self.logger.info("Generating lazy-loaded content...")
-            content = self._generate_lazy_content()
+            # Save HTML file
+            html_file = self.output_dir / f"{self.filename}_report.html"
+            self.logger.info(f"Writing HTML file to: {html_file}")
 
-            self.logger.info("Generating footer template...")
-            footer = HTMLTemplate.get_footer_template()
+            # Binary mode with a large buffer: each piece is UTF-8 encoded in one C call,
+            # bypassing the text layer's incremental encoder
+            with open(html_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                self.write_html(f)
 
-            self.logger.info("Getting main template...")
-            main_template = HTMLTemplate.get_main_template(self.filename)
+            # Stylesheet and script shared by every report in the output directory
+            assets = HTMLTemplate.write_assets(self.output_dir)
 
-            self.logger.info("Replacing template placeholders...")
-            # Use simple string replacement with comment-style placeholders to avoid CSS/JS conflicts
-            html_content = main_template.replace('<!--MODAL_PLACEHOLDER-->', modal)
-            html_content = html_content.replace('<!--SETTINGS_PLACEHOLDER-->', settings)
-            html_content = html_content.replace('<!--HEADER_PLACEHOLDER-->', header)
-            html_content = html_content.replace('<!--STATS_PLACEHOLDER-->', stats)
-            html_content = html_content.replace('<!--CONTENT_PLACEHOLDER-->', content)
-            html_content = html_content.replace('<!--FOOTER_PLACEHOLDER-->', footer)
+            if self.compress:
+                self._write_compressed_copies(html_file)
+                # Shared assets never change under their hashed names, so copies
+                # from an earlier report in this directory are still current
+                for path in assets:
+                    if not Path(f"{path}.gz").exists():
+                        self._write_compressed_copies(path)
 
             # Generate JSON data for lazy loading
             self._generate_pages_json()
 
-            # Save HTML file
-            html_file = self.output_dir / f"{self.filename}_report.html"
-            self.logger.info(f"Writing HTML file to: {html_file}")
-
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-
             self.logger.info("HTML report generation completed successfully!")
             return str(html_file)
 
@@ -220,44 +366,157 @@ class HTMLBuilder:
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             raise
 
+    def write_html(self, fp: BinaryIO) -> None:
+        """Stream the HTML report to a binary file object as UTF-8.
+
+        Sections are written as they are produced, so at most one page section
+        is held in memory at a time.
+        """
+        # Build all components
+        self.logger.info("Generating modal template...")
+        modal = HTMLTemplate.get_modal_template()
+
+        self.logger.info("Generating settings template...")
+        settings = HTMLTemplate.get_settings_template()
+
+        # Escaped once; the <title> and the header share the same string
+        escaped_filename = html.escape(self.filename)
+
+        self.logger.info("Generating header template...")
+        header = HTMLTemplate.get_header_template(
+            escaped_filename,
+            self.extraction_result['pages'],
+            len(self.unique_images)
+        )
+
+        self.logger.info("Generating stats template...")
+        stats = HTMLTemplate.get_stats_template(
+            self.extraction_result['pages'],
+            self.doc_word_count,
+            self.doc_token_count,
+            len(self.regular_images),
+            len(self.small_images),
+            len(self.unique_images),
+            len(self.extraction_result['images']) - len(self.unique_images),
+            self.min_image_size
+        )
+
+        self.logger.info("Generating lazy-loaded content...")
+        content = self._generate_lazy_content()
+
+        self.logger.info("Generating footer template...")
+        footer = HTMLTemplate.get_footer_template()
+
+        self.logger.info("Getting main template...")
+        main_segments = HTMLTemplate.get_main_segments(escaped_filename)
+
+        # Sections replacing the comment-style placeholders (used to avoid CSS/JS conflicts)
+        sections: Dict[str, Iterable[str]] = {
+            'MODAL': (modal,),
+            'SETTINGS': (settings,),
+            'HEADER': (header,),
+            'STATS': (stats,),
+            'CONTENT': content,
+            'FOOTER': (footer,),
+        }
+
+        # The segments alternate fixed template slices with placeholder names; stream
+        # each section to disk as it is produced instead of building one string
+        for i, segment in enumerate(main_segments):
+            if i % 2:
+                fp.writelines(part.encode('utf-8') for part in sections[segment])
+            else:
+                fp.write(segment.encode('utf-8'))
+
+    def _write_compressed_copies(self, path: Path) -> None:
+        """Write pre-compressed copies of a report file for servers that send Content-Encoding.
+
+        A .gz copy is always written; a .br copy is added when brotli is installed.
+        """
+        self.logger.info(f"Writing compressed copies of {path.name}")
+        with open(path, 'rb') as src, gzip.open(f"{path}.gz", 'wb', compresslevel=9) as dst:
+            shutil.copyfileobj(src, dst, WRITE_BUFFER_SIZE)
+
+        if brotli is not None:
+            compressor = brotli.Compressor(quality=11)
+            with open(path, 'rb') as src, open(f"{path}.br", 'wb') as dst:
+                for block in iter(lambda: src.read(WRITE_BUFFER_SIZE), b''):
+                    dst.write(compressor.process(block))
+                dst.write(compressor.finish())
+
     def _generate_pages_json(self):
-        """Generate JSON data for lazy loading pages"""
-        pages_data = {}
-
-        for i, page_data in enumerate(self.extraction_result['pages_data']):
-            pages_data[str(page_data['page_number'])] = {
-                'page_number': page_data['page_number'],
-                'text': page_data.get('text', ''),
-                'word_count': self._count_words(page_data.get('text', '')),
-                'token_count': self._estimate_tokens(page_data.get('text', '')),
-                'images': [img for img in self.extraction_result['images'] if img['page'] == page_data['page_number']],
-                'screenshot': page_data.get('screenshot')
-            }
-
-        # Save to JSON file
-        json_file = self.output_dir / f"{self.filename}_pages.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(pages_data, f, indent=2, ensure_ascii=False)
-
-    def _generate_lazy_content(self) -> str:
-        """Generate main content section with lazy loading structure"""
-        content = f"""
+        """Generate JSON data for lazy loading pages.
+
+        Pages are written in shards of pages_per_chunk pages ({filename}_pages_{n}.ndjson,
+        one page object per line) so the report only fetches the chunks it displays and
+        can parse each page as it streams in. {filename}_pages.json is a small index
+        listing the total page count and the shard files.
+        """
+        chunks = {}
+
+        # Pages are ordered, so each shard is complete once the next one starts
+        pages = self.extraction_result['pages_data']
+        for chunk_idx, chunk_pages in groupby(pages, key=lambda page: (page['page_number'] - 1) // self.pages_per_chunk):
+            pages_data = (
+                {
+                    'page_number': page_data['page_number'],
+                    'text': page_data.get('text', ''),
+                    'word_count': self._count_words(page_data.get('text', '')),
+                    'token_count': self._estimate_tokens(page_data.get('text', '')),
+                    'images': self._images_by_page.get(page_data['page_number'], []),
+                    'screenshot': page_data.get('screenshot')
+                }
+                for page_data in chunk_pages
+            )
+
+            chunk_file = f"{self.filename}_pages_{chunk_idx}.ndjson"
+            self._write_ndjson(self.output_dir / chunk_file, pages_data)
+            chunks[str(chunk_idx)] = chunk_file
+
+        self._write_json(self.output_dir / f"{self.filename}_pages.json", {
+            'total_pages': len(pages),
+            'chunk_size': self.pages_per_chunk,
+            'chunks': chunks
+        })
+
+    @staticmethod
+    def _write_json(json_file: Path, data: Any):
+        """Save JSON compactly, since it is only consumed by the report's JavaScript"""
+        if orjson is not None:
+            json_file.write_bytes(orjson.dumps(data))
+        else:
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def _write_ndjson(ndjson_file: Path, records: Iterable[Any]):
+        """Save records as newline-delimited JSON, one compact object per line"""
+        with open(ndjson_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            for record in records:
+                if orjson is not None:
+                    f.write(orjson.dumps(record))
+                else:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                f.write(b'\n')
+
+    def _generate_lazy_content(self) -> Iterator[str]:
+        """Generate main content section with lazy loading structure, yielding one page at a time"""
+        yield """
     <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 pb-8">
         <div id="pagesContainer" class="space-y-8">
             <!-- Loading indicator -->
             <div id="loadingIndicator" class="text-center py-8">
                 <div class="inline-flex items-center px-4 py-2 font-semibold leading-6 text-sm shadow rounded-md text-white bg-indigo-500 hover:bg-indigo-400 transition ease-in-out duration-150 cursor-not-allowed">
-                    <svg class="animate-spin -ml-1 mr-3 h-5 w-5 text-white" xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24">
-                        <circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle>
-                        <path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
-                    </svg>
+                    <svg class="animate-spin -ml-1 mr-3 h-5 w-5 text-white"><use href="#i-spinner"></use></svg>
                     Loading pages...
                 </div>
             </div>
             
             <!-- Load first chunk immediately -->
             <div id="initialPages">
-                {self._generate_page_chunk(0, min(self.pages_per_chunk, self.total_pages))}
+                """
+        yield from self._generate_page_chunk(0, min(self.pages_per_chunk, self.total_pages))
+        yield f"""
             </div>
             
             <!-- Placeholder for additional chunks -->
@@ -273,9 +532,7 @@ class HTMLBuilder:
             <!-- End indicator -->
             <div id="endIndicator" class="text-center py-8 text-gray-500" style="display: none;">
                 <div class="flex items-center justify-center">
-                    <svg class="w-5 h-5 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 13l4 4L19 7"></path>
-                    </svg>
+                    <svg class="w-5 h-5 mr-2"><use href="#i-tick"></use></svg>
                     All pages loaded
                 </div>
             </div>
@@ -283,95 +540,52 @@ class HTMLBuilder:
     </div>
         """
 
-        return content
-
-    def _generate_page_chunk(self, start_idx: int, end_idx: int) -> str:
-        """Generate a chunk of pages"""
-        chunk_html = ""
-
+    def _generate_page_chunk(self, start_idx: int, end_idx: int) -> Iterator[str]:
+        """Generate a chunk of pages, yielding each page section as it is built"""
+        pages_data = self.extraction_result['pages_data']
         for i in range(start_idx, min(end_idx, self.total_pages)):
-            page_data = self.extraction_result['pages_data'][i]
-            chunk_html += self._generate_page_section(page_data)
-
-        return chunk_html
+            yield self._generate_page_section(pages_data[i])
 
     def _generate_page_section(self, page_data: Dict[str, Any]) -> str:
         """Generate a single page section"""
         page_num = page_data['page_number']
-        page_images = [img for img in self.extraction_result['images'] if img['page'] == page_num]
 
         # Calculate page-specific stats
         page_text = page_data.get('text', '')
         page_word_count = self._count_words(page_text)
         page_token_count = self._estimate_tokens(page_text)
 
-        # Filter images by size
-        min_area = self.min_image_size * self.min_image_size
-        regular_page_images = [img for img in page_images if img.get('width', 0) * img.get('height', 0) >= min_area]
-        small_page_images = [img for img in page_images if img.get('width', 0) * img.get('height', 0) < min_area]
+        # Images split by size, precomputed per page
+        regular_page_images, small_page_images = self._page_image_partitions.get(page_num, ([], []))
 
-        screenshot = page_data.get('screenshot')
-
-        return f"""
-        <div class="bg-white rounded-xl shadow-lg border border-gray-200 overflow-hidden page-section" data-page="{page_num}">
-            <div class="bg-gradient-to-r from-blue-600 to-purple-600 px-6 py-4">
-                <h2 class="text-xl font-semibold text-white flex items-center">
-                    <span class="bg-white bg-opacity-20 rounded-full w-8 h-8 flex items-center justify-center mr-3 text-sm">
-                        {page_num}
-                    </span>
-                    Page {page_num}
-                    <span class="ml-auto flex items-center space-x-3 text-sm">
-                        <span class="bg-white bg-opacity-20 px-2 py-1 rounded-full">
-                            {page_word_count:,} words
-                        </span>
-                        <span class="bg-white bg-opacity-20 px-2 py-1 rounded-full">
-                            {page_token_count:,} tokens
-                        </span>
-                        <span class="bg-white bg-opacity-20 px-2 py-1 rounded-full">
-                            {len(regular_page_images)} images
-                        </span>
-                        {f'<span class="bg-white bg-opacity-20 px-2 py-1 rounded-full text-xs">{len(small_page_images)} small</span>' if small_page_images else ''}
-                    </span>
-                </h2>
-            </div>
-            
-            <div class="p-6">
-                <div class="grid grid-cols-1 lg:grid-cols-3 gap-8">
-                    <div class="lg:col-span-1">
-                        {self._generate_screenshot_section(screenshot, page_num)}
-                    </div>
-                    <div class="lg:col-span-2 grid grid-cols-1 gap-8">
-                        <div class="space-y-6">
-                            <div>
-                                <h3 class="text-lg font-semibold text-gray-900 mb-3 flex items-center">
-                                    <svg class="w-5 h-5 mr-2 text-blue-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"></path>
-                                    </svg>
-                                    Text Content
-                                </h3>
-                                <div class="bg-gray-50 rounded-lg p-4 max-h-96 overflow-y-auto">
-                                    <pre class="text-sm text-gray-700 whitespace-pre-wrap font-mono leading-relaxed">{page_text[:2000]}{'...' if len(page_text) > 2000 else ''}</pre>
-                                </div>
-                            </div>
-                        </div>
+        # Short pages are embedded as-is; only long ones are sliced and get an ellipsis.
+        # The text is escaped in one call so markup-like content renders literally.
+        if len(page_text) > TEXT_PREVIEW_LENGTH:
+            text_preview = html.escape(page_text[:TEXT_PREVIEW_LENGTH], quote=False) + '...'
+        else:
+            text_preview = html.escape(page_text, quote=False)
 
-                        <div class="space-y-6">
-                            {self._generate_images_section(regular_page_images, small_page_images)}
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        """
+        screenshot = page_data.get('screenshot')
+        small_badge = (
+            f'<span class="bg-white bg-opacity-20 px-2 py-1 rounded-full text-xs">{len(small_page_images)} small</span>'
+            if small_page_images else ''
+        )
+
+        return PAGE_SECTION_TEMPLATE.format(
+            page_num=page_num,
+            page_word_count=page_word_count,
+            page_token_count=page_token_count,
+            regular_count=len(regular_page_images),
+            small_badge=small_badge,
+            screenshot_section=self._generate_screenshot_section(screenshot, page_num),
+            text_preview=text_preview,
+            images_section=self._generate_images_section(regular_page_images, small_page_images),
+        )
 
     def _generate_screenshot_section(self, screenshot: Optional[Dict[str, Any]], page_num: int) -> str:
         """Generate the screenshot section for a page"""
         if not screenshot or not screenshot.get('filename'):
-            return """
-            <div class="bg-gray-50 rounded-lg p-8 text-center">
-                <p class="text-gray-500">No screenshot available</p>
-            </div>
-            """
+            return NO_SCREENSHOT_HTML
 
         # Add an 'index' for compatibility with the card generator
         screenshot['index'] = 'screenshot'
@@ -379,9 +593,7 @@ class HTMLBuilder:
         return f"""
         <div>
             <h3 class="text-lg font-semibold text-gray-900 mb-3 flex items-center">
-                <svg class="w-5 h-5 mr-2 text-gray-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z"></path>
-                </svg>
+                <svg class="w-5 h-5 mr-2 text-gray-600"><use href="#i-image"></use></svg>
                 Page Screenshot
             </h3>
             {self._generate_image_card(screenshot, is_small=False, is_screenshot=True)}
@@ -390,138 +602,121 @@ class HTMLBuilder:
 
     def _generate_images_section(self, regular_images: List[Dict[str, Any]], small_images: List[Dict[str, Any]]) -> str:
         """Generate images section for a page with size filtering"""
-        content = f"""
+        parts = [f"""
         <div>
             <h3 class="text-lg font-semibold text-gray-900 mb-3 flex items-center">
-                <svg class="w-5 h-5 mr-2 text-purple-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 002 2z"></path>
-                </svg>
+                <svg class="w-5 h-5 mr-2 text-purple-600"><use href="#i-image"></use></svg>
                 Images ({len(regular_images)} regular{f', {len(small_images)} small' if small_images else ''})
             </h3>
-        """
+        """]
 
         if not regular_images and not small_images:
-            content += """
-            <div class="bg-gray-50 rounded-lg p-8 text-center">
-                <svg class="w-12 h-12 text-gray-400 mx-auto mb-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 002 2z"></path>
-                </svg>
-                <p class="text-gray-500">No images found on this page</p>
-            </div>
-            """
+            parts.append(NO_IMAGES_HTML)
         else:
             # Regular images (always visible)
             if regular_images:
-                content += f"""
+                parts.append("""
                 <div class="grid grid-cols-1 sm:grid-cols-2 gap-4 regular-images">
-                """
-                for img in regular_images:
-                    content += self._generate_image_card(img, is_small=False)
-                content += """
+                """)
+                parts.extend(self._generate_image_card(img, is_small=False) for img in regular_images)
+                parts.append("""
                 </div>
-                """
+                """)
 
             # Small images (hidden by default)
             if small_images:
-                content += f"""
+                parts.append(f"""
                 <div class="small-images mt-6">
                     <div class="mb-3 p-3 bg-yellow-50 border border-yellow-200 rounded-lg">
                         <div class="flex items-center">
-                            <svg class="w-5 h-5 text-yellow-600 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-2.5L13.732 4c-.77-.833-1.964-.833-2.732 0L4.082 16.5c-.77.833.192 2.5 1.732 2.5z"></path>
-                            </svg>
+                            <svg class="w-5 h-5 text-yellow-600 mr-2"><use href="#i-warning"></use></svg>
                             <span class="text-sm font-medium text-yellow-800">Small Images & UI Elements</span>
                         </div>
                         <p class="text-xs text-yellow-600 mt-1">These images have an area smaller than {self.min_image_size}×{self.min_image_size} pixels and likely contain UI elements, icons, or decorative graphics</p>
                     </div>
                     <div class="grid grid-cols-2 sm:grid-cols-3 md:grid-cols-4 gap-2">
-                """
-                for img in small_images:
-                    content += self._generate_image_card(img, is_small=True)
-                content += """
+                """)
+                parts.extend(self._generate_image_card(img, is_small=True) for img in small_images)
+                parts.append("""
                     </div>
                 </div>
-                """
+                """)
 
-        content += """
+        parts.append("""
         </div>
-        """
+        """)
 
-        return content
+        return ''.join(parts)
 
     def _generate_image_card(self, img: Dict[str, Any], is_small: bool = False, is_screenshot: bool = False) -> str:
         """Generate a single image card"""
         if img.get('filename'):
             # Check if this is a duplicate or similar image
-            is_duplicate = False
-            is_similar = False
-            duplicate_count = 0
-
+            duplicate_role, duplicate_count = None, 0
             if not is_screenshot and img.get('hash'):
-                for img_hash, duplicates in self.duplicate_groups.items():
-                    if img['hash'] == img_hash:
-                        is_duplicate = True
-                        duplicate_count = len(duplicates)
-                        break
-                    elif img in duplicates:
-                        is_similar = True
-                        duplicate_count = len(duplicates)
-                        break
+                duplicate_role, duplicate_count = self._duplicate_roles.get(id(img), (None, 0))
 
-            # Different styling for small images
+            # Different styling for small images and screenshots
             if is_small:
-                card_class = "bg-white rounded-lg border border-gray-200 overflow-hidden shadow-sm hover:shadow-md transition-shadow"
-                image_class = "w-full h-20 object-contain clickable-image hover:scale-105 transition-transform duration-200"
-                padding_class = "p-2"
+                image_class, padding_class = SMALL_IMAGE_CLASSES
+            elif is_screenshot:
+                image_class, padding_class = SCREENSHOT_IMAGE_CLASSES
             else:
-                card_class = "bg-white rounded-lg border border-gray-200 overflow-hidden shadow-sm hover:shadow-md transition-shadow"
-                image_class = "w-full h-auto object-contain clickable-image" if is_screenshot else "w-full h-48 object-contain clickable-image hover:scale-105 transition-transform duration-200"
-                padding_class = "p-3"
+                image_class, padding_class = REGULAR_IMAGE_CLASSES
 
             # Choose appropriate indicator
             if is_screenshot:
                 indicator = ""
-            elif is_duplicate:
+            elif duplicate_role == 'duplicate':
                 indicator = f"""
-                    <div class="duplicate-indicator">
+                    <div class="indicator">
                         DUP {duplicate_count}x
                     </div>
                 """
-            elif is_similar:
+            elif duplicate_role == 'similar':
                 indicator = f"""
-                    <div class="similar-indicator">
+                    <div class="indicator sim">
                         SIM {duplicate_count}x
                     </div>
                 """
             else:
-                indicator = """
-                    <div class="unique-indicator">
-                        UNIQUE
-                    </div>
-                """
+                indicator = UNIQUE_INDICATOR
+
+            # Read each field once; the card interpolates most of them several times
+            page, index, width, height = img['page'], img['index'], img['width'], img['height']
 
-            alt_text = f"Screenshot of Page {img['page']}" if is_screenshot else f"Page {img['page']} Image {img['index']}"
-            data_image_id = f"page_{img['page']}_screenshot" if is_screenshot else f"{img['page']}_{img['index']}"
+            # Escape the file-derived fields once per card rather than at each interpolation
+            filename = html.escape(img['filename'])
+            img_format = html.escape(img.get('format', 'unknown'))
+            img_hash = html.escape(img.get('hash') or '')
+
+            alt_text = f"Screenshot of Page {page}" if is_screenshot else f"Page {page} Image {index}"
+            data_image_id = f"page_{page}_screenshot" if is_screenshot else f"{page}_{index}"
 
             return f"""
                 <div class="relative group">
-                    <div class="{card_class}">
-                        <div class="aspect-w-16 aspect-h-9 bg-gray-100 relative" onclick="openModal('images/{img['filename']}', '{img['page']}', '{img['index']}', '{img['width']}', '{img['height']}', '{img.get('format', 'unknown')}', '{self._format_bytes(img.get('size_bytes', 0))}', '{img.get('hash', '')[:8]}')">
+                    <div class="{IMAGE_CARD_CLASS}">
+                        <div class="aspect-w-16 aspect-h-9 bg-gray-100 relative" data-action="open-modal">
                             <img 
-                                src="./images/{img['filename']}"
+                                src="./images/{filename}"
                                 alt="{alt_text}"
                                 class="{image_class}"
                                 data-image-id="{data_image_id}"
-                                data-image-filename="{img['filename']}"
-                                data-image-hash="{img.get('hash', '')}"
-                                data-width="{img['width']}"
-                                data-height="{img['height']}"
+                                data-image-filename="{filename}"
+                                data-image-hash="{img_hash}"
+                                data-width="{width}"
+                                data-height="{height}"
+                                data-page="{page}"
+                                data-index="{index}"
+                                data-format="{img_format}"
+                                data-size="{self._format_bytes(img.get('size_bytes', 0))}"
                                 loading="lazy"
+                                decoding="async"
                             >
                             <div class="absolute inset-0 bg-black bg-opacity-0 group-hover:bg-opacity-10 transition-opacity duration-200"></div>
                             {indicator}
                             
-                            {self._generate_ai_button() if not is_small else ''}
+                            {AI_BUTTON_HTML if not is_small else ''}
                             
                             <!-- Expand indicator -->
                             <div class="absolute bottom-1 right-1 bg-black bg-opacity-60 text-white px-1 py-0.5 rounded text-xs opacity-0 group-hover:opacity-100 transition-opacity duration-200 expand-pill">
@@ -530,10 +725,10 @@ class HTMLBuilder:
                         </div>
                         <div class="{padding_class}">
                             <div class="flex items-center justify-between text-xs text-gray-600">
-                                <span class="font-medium">{'Screenshot' if is_screenshot else f"Image {img['index']}"}</span>
-                                <span class="bg-gray-100 px-1 py-0.5 rounded text-xs">{img.get('format', 'PNG').upper()}</span>
+                                <span class="font-medium">{'Screenshot' if is_screenshot else f"Image {index}"}</span>
+                                <span class="bg-gray-100 px-1 py-0.5 rounded text-xs">{img_format.upper()}</span>
                             </div>
-                            {f'<div class="mt-1 text-xs text-gray-500"><span>{img["width"]} × {img["height"]}</span></div>' if not is_small else ''}
+                            {f'<div class="mt-1 text-xs text-gray-500"><span>{width} × {height}</span></div>' if not is_small else ''}
                             {self._generate_ai_analysis_section(img) if not is_small else ''}
                         </div>
                     </div>
@@ -543,46 +738,26 @@ class HTMLBuilder:
             return f"""
                 <div class="bg-red-50 border border-red-200 rounded-lg p-4">
                     <div class="flex items-center">
-                        <svg class="w-5 h-5 text-red-400 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4m0 4h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z"></path>
-                        </svg>
+                        <svg class="w-5 h-5 text-red-400 mr-2"><use href="#i-error"></use></svg>
                         <span class="text-sm text-red-700">Failed to extract image {img['index']}</span>
                     </div>
                 </div>
             """
 
-    def _generate_ai_button(self) -> str:
-        """Generate clickable AI analysis button"""
-        return """
-            <button 
-                class="absolute top-2 right-2 bg-gradient-to-r from-purple-500 to-pink-500 hover:from-purple-600 hover:to-pink-600 text-white px-3 py-1 rounded-full text-xs font-semibold opacity-0 group-hover:opacity-100 transition-all duration-200 flex items-center space-x-1 cursor-pointer shadow-lg ai-analysis-button"
-                onclick="analyzeImageFromButton(this, event)"
-                title="Click for AI analysis"
-                style="display: none;"
-            >
-                <svg class="w-3 h-3" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 10V3L4 14h7v7l9-11h-7z"></path>
-                </svg>
-                <span>AI</span>
-            </button>
-        """
-
     def _generate_ai_analysis_section(self, img: Dict[str, Any]) -> str:
         """Generate AI analysis section in the card"""
         image_id = f"page_{img['page']}_screenshot" if img['index'] == 'screenshot' else f"{img['page']}_{img['index']}"
 
         return f"""
-            <div class="mt-3 pt-3 border-t border-gray-100 ai-analysis-section" style="display: none;">
+            <div class="mt-3 pt-3 border-t border-gray-100 ai-analysis-section">
                 <div class="flex items-center justify-between mb-2">
                     <span class="text-xs font-semibold text-purple-600 flex items-center">
-                        <svg class="w-3 h-3 mr-1" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 10V3L4 14h7v7l9-11h-7z"></path>
-                        </svg>
+                        <svg class="w-3 h-3 mr-1"><use href="#i-bolt"></use></svg>
                         AI Analysis
                     </span>
                     <button
                         class="text-xs bg-purple-100 hover:bg-purple-200 text-purple-700 px-2 py-1 rounded transition-colors"
-                        onclick="toggleAnalysis('{image_id}')"
+                        data-action="toggle-analysis"
                         id="btn-{image_id}"
                     >
                         Analyze
@@ -599,8 +774,10 @@ class HTMLBuilder:
             </div>
         """
 
-    def _format_bytes(self, bytes_size: int) -> str:
-        """Format bytes to human readable format"""
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _format_bytes(bytes_size: int) -> str:
+        """Format bytes to human readable format (memoized, as duplicates share sizes)"""
         for unit in ['B', 'KB', 'MB', 'GB']:
             if bytes_size < 1024.0:
                 return f"{bytes_size:.1f} {unit}"
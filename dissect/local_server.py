@@ -9,6 +9,7 @@ import http.server
 import json
 import mimetypes
 import os
+import re
 import socketserver
 import sys
 import time
@@ -17,6 +18,9 @@ from datetime import datetime
 from pathlib import Path
 from urllib.parse import unquote
 
+# Sidecar stylesheet/script written next to the reports, e.g. report.1a2b3c4d5e6f.js
+HASHED_ASSET_RE = re.compile(r'/report\.[0-9a-f]{12}\.(?:css|js)$')
+
 
 class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """Enhanced HTTP request handler with CORS headers and better file handling"""
@@ -46,6 +50,9 @@ class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 elif self.path.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')):
                     # Cache images for 1 hour
                     self.send_header('Cache-Control', 'public, max-age=3600')
+                elif HASHED_ASSET_RE.search(self.path):
+                    # Report stylesheet/script named after their content hash never change
+                    self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
                 elif self.path.endswith(('.css', '.js')):
                     # Cache static assets for 1 day
                     self.send_header('Cache-Control', 'public, max-age=86400')
@@ -124,6 +131,10 @@ class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                     self.send_error(404, f"File not found: {path}")
                     return
             
+            # Prefer a pre-compressed copy of the report or its assets when the client accepts one
+            if self.path.endswith(('.html', '.css', '.js')) and self.send_precompressed(self.translate_path(self.path)):
+                return
+
             # Handle regular file requests
             super().do_GET()
             
@@ -138,6 +149,26 @@ class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             traceback.print_exc()
             self.send_error(500, f"Server error: {str(e)}")
 
+    def send_precompressed(self, path: str) -> bool:
+        """Serve a .br/.gz sibling of path written by the extractor, if the client accepts it"""
+        accepted = self.headers.get('Accept-Encoding', '')
+        for suffix, encoding in (('.br', 'br'), ('.gz', 'gzip')):
+            compressed = path + suffix
+            # Skip copies left over from an older run of the extractor
+            if (encoding in accepted and os.path.isfile(compressed)
+                    and os.path.getmtime(compressed) >= os.path.getmtime(path)):
+                with open(compressed, 'rb') as f:
+                    data = f.read()
+                self.send_response(200)
+                self.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+                self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                self.wfile.write(data)
+                return True
+        return False
+
     def guess_type(self, path):
         """Enhanced MIME type guessing with better error handling"""
         try:
@@ -150,6 +181,8 @@ class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         # Handle special cases
         if path.endswith('.json'):
             return 'application/json', encoding
+        elif path.endswith('.ndjson'):
+            return 'application/x-ndjson', encoding
         elif path.endswith('.webp'):
             return 'image/webp', encoding
         elif path.endswith('.svg'):
@@ -241,13 +274,14 @@ class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                     with open(json_file, 'r', encoding='utf-8') as f:
                         data = json.load(f)
                         
+                    # The pages JSON is an index of per-chunk page data files
                     pages_info.append({
                         'filename': json_file.name,
                         'basename': json_file.stem.replace('_pages', ''),
-                        'total_pages': len(data),
+                        'total_pages': data.get('total_pages', 0),
                         'size': json_file.stat().st_size,
                         'modified': datetime.fromtimestamp(json_file.stat().st_mtime).isoformat(),
-                        'pages': list(data.keys())
+                        'chunks': list(data.get('chunks', {}).values())
                     })
                 except Exception as e:
                     pages_info.append({
@@ -309,7 +343,7 @@ class EnhancedCORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                         with open(pages_json_file, 'r', encoding='utf-8') as f:
                             pages_data = json.load(f)
                             report_info.update({
-                                'total_pages': len(pages_data),
+                                'total_pages': pages_data.get('total_pages', 0),
                                 'pages_json_size': pages_json_file.stat().st_size
                             })
                     except Exception as e:
@@ -418,7 +452,7 @@ def find_html_files(directory):
             try:
                 with open(pages_json_file, 'r', encoding='utf-8') as f:
                     pages_data = json.load(f)
-                    info['total_pages'] = len(pages_data)
+                    info['total_pages'] = pages_data.get('total_pages', 0)
             except:
                 info['total_pages'] = 'unknown'
 
@@ -4,14 +4,16 @@ Updated to use the new HTMLBuilder architecture
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Any, Optional
 
 from dissect.html_builder import HTMLBuilder
+from dissect.utils import compute_phash
 
 # Import the new modules
 
@@ -26,9 +28,11 @@ except ImportError:
 class PDFExtractor:
     """Enhanced PDF extractor with AI-powered analysis"""
 
-    def __init__(self, api_key: Optional[str] = None, min_image_size: int = 256):
+    def __init__(self, api_key: Optional[str] = None, min_image_size: int = 256,
+                 compress: bool = False):
         self.api_key = api_key
         self.min_image_size = min_image_size
+        self.compress = compress
         self.logger = self._setup_logging()
 
     def _setup_logging(self) -> logging.Logger:
@@ -73,7 +77,8 @@ class PDFExtractor:
             output_dir=output_dir,
             filename=pdf_path.stem,
             api_key=self.api_key,
-            min_image_size=self.min_image_size
+            min_image_size=self.min_image_size,
+            compress=self.compress
         )
 
         html_file = html_builder.generate_html()
@@ -148,10 +153,6 @@ class PDFExtractor:
 
         doc.close()
 
-        # Post-process images to add hashes for duplicate detection
-        self.logger.info("Processing images for duplicate detection...")
-        self._add_image_hashes(extraction_result['images'])
-
         self.logger.info(f"Extraction completed: {len(extraction_result['images'])} total images")
 
         return extraction_result
@@ -225,7 +226,10 @@ class PDFExtractor:
                 'height': pix.height,
                 'format': img_ext,
                 'size_bytes': len(img_data),
-                'xref': xref
+                'xref': xref,
+                # Content hash: keys duplicate detection and the analyses the report caches
+                'hash': hashlib.md5(img_data).hexdigest(),
+                'phash': compute_phash(img_data)
             }
 
             pix = None
@@ -274,21 +278,6 @@ class PDFExtractor:
             self.logger.error(f"Failed to generate screenshot for page {page_num}: {e}")
             return None
 
-    def _add_image_hashes(self, images: List[Dict[str, Any]]) -> None:
-        """Add content hashes to images for duplicate detection"""
-        import hashlib
-
-        for img in images:
-            if img.get('filename'):
-                try:
-                    # Create a simple hash based on image properties
-                    # In a full implementation, you'd hash the actual image data
-                    hash_input = f"{img['width']}x{img['height']}_{img['size_bytes']}_{img['format']}"
-                    img['hash'] = hashlib.md5(hash_input.encode()).hexdigest()
-                except Exception as e:
-                    self.logger.warning(f"Failed to generate hash for {img['filename']}: {e}")
-                    img['hash'] = None
-
 
 def main():
     """Main function for command line usage"""
@@ -298,6 +287,8 @@ def main():
     parser.add_argument("-k", "--api-key", help="Google API key for AI analysis")
     parser.add_argument("-s", "--min-size", type=int, default=256,
                         help="Minimum image size for filtering (default: 256)")
+    parser.add_argument("-z", "--compress", action="store_true",
+                        help="Also write pre-compressed .gz/.br copies of the HTML report")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
 
     args = parser.parse_args()
@@ -309,7 +300,8 @@ def main():
     # Create extractor
     extractor = PDFExtractor(
         api_key=args.api_key,
-        min_image_size=args.min_size
+        min_image_size=args.min_size,
+        compress=args.compress
     )
 
     try:
@@ -4,9 +4,12 @@ Common utilities and helper functions
 """
 
 import logging
+import math
 import subprocess
 import sys
-from typing import List, Dict, Any
+from operator import mul
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
 
 
 def setup_logging(level: int = logging.INFO) -> logging.Logger:
@@ -74,6 +77,51 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} {size_names[i]}"
 
 
+# pHash parameters: grayscale is resized to 32x32 and the 8x8 lowest DCT frequencies are kept
+PHASH_IMAGE_SIZE = 32
+PHASH_HASH_SIZE = 8
+
+# Orthogonal DCT-II basis rows for the low-frequency coefficients, computed once
+_PHASH_DCT_BASIS = [
+    [math.cos(math.pi * (2 * n + 1) * k / (2 * PHASH_IMAGE_SIZE)) for n in range(PHASH_IMAGE_SIZE)]
+    for k in range(PHASH_HASH_SIZE)
+]
+
+
+def compute_phash(source: Union[bytes, str, Path]) -> Optional[str]:
+    """Compute a 64-bit DCT perceptual hash (pHash) as a 16-digit hex string.
+
+    Accepts raw encoded image bytes or a path to an image file.
+    Returns None if the image cannot be decoded.
+    """
+    import io
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+            gray = image.convert('L').resize((PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE), Image.LANCZOS)
+            pixels = list(gray.getdata())
+    except Exception:
+        return None
+
+    size = PHASH_IMAGE_SIZE
+    rows = [pixels[y * size:(y + 1) * size] for y in range(size)]
+
+    # Separable 2D DCT restricted to the low-frequency block: rows first, then columns.
+    # sum(map(mul, ...)) keeps the dot products in C instead of a generator per element.
+    row_coeffs = [[sum(map(mul, basis, row)) for basis in _PHASH_DCT_BASIS] for row in rows]
+    columns = list(zip(*row_coeffs))
+    coeffs = [sum(map(mul, basis, column)) for basis in _PHASH_DCT_BASIS for column in columns]
+
+    # Binarize against the median, excluding the DC term which only encodes brightness
+    median = sorted(coeffs[1:])[len(coeffs[1:]) // 2]
+    value = 0
+    for coeff in coeffs:
+        value = (value << 1) | (coeff > median)
+
+    return f"{value:016x}"
+
+
 def create_safe_filename(filename: str) -> str:
     """Create a safe filename by removing/replacing problematic characters"""
     import re
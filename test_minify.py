@@ -0,0 +1,44 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the dissect directory to the python path
+sys.path.append(str(Path(__file__).parent / "dissect"))
+
+from html_template import _minify_css, _minify_js
+
+
+class TestMinifyJS(unittest.TestCase):
+
+    def test_regex_after_keyword(self):
+        """A '/' after return/typeof starts a regex literal, not a division"""
+        source = "function f(s){\n  return /'/.test(s);\n}"
+        self.assertEqual(_minify_js(source), "function f(s){\nreturn /'/.test(s);\n}")
+        self.assertEqual(_minify_js("t = typeof /x/"), "t = typeof /x/")
+
+    def test_division_after_identifier(self):
+        self.assertEqual(_minify_js("x = a / b / c"), "x = a / b / c")
+
+    def test_unterminated_literals_fall_back_to_source(self):
+        for source in ('var a = "abc', "x = `abc", "x = /abc", "a /* x"):
+            with self.subTest(source=source):
+                self.assertEqual(_minify_js(source), source)
+
+    def test_literals_are_kept_verbatim(self):
+        source = "const s = 'a  // b';\n    const t = `x ${ y } z`; // note\n"
+        self.assertEqual(_minify_js(source), "const s = 'a  // b';\nconst t = `x ${ y } z`;")
+
+
+class TestMinifyCSS(unittest.TestCase):
+
+    def test_descendant_pseudo_class_keeps_its_space(self):
+        """'.a :hover' matches hovered descendants; '.a:hover' would match .a itself"""
+        self.assertEqual(_minify_css(".a :hover { color : red ; }"), ".a :hover{color:red}")
+
+    def test_declarations_are_collapsed(self):
+        css = "@media (max-width: 600px) {\n  .b:focus , .c { margin : 0 ; padding: 1px }\n}"
+        self.assertEqual(_minify_css(css), "@media (max-width: 600px){.b:focus,.c{margin:0;padding:1px}}")
+
+
+if __name__ == '__main__':
+    unittest.main()